@@ -1,23 +1,44 @@
+import threading
 import tkinter as tk
-from tkinter import messagebox, simpledialog, scrolledtext
-import json
-import random
+from tkinter import filedialog, messagebox, simpledialog
+from core.background_writer import BackgroundWriter
+from core.quiz_scheduler import QuizScheduler
+from core.vocab_import import import_file
+from core.vocab_search import SearchIndex
+from core.vocab_store import open_deck
+from gui.instrument import Instrument
+from gui.list_view import ListboxView, VirtualListView
+from gui.progress_dialog import ProgressDialog
+from gui.worker import Worker
 
 # 保存するファイル名
 DATA_FILE = "vocabulary.json"
 
-# 単語データの読み込み
+# True にするとバイナリ形式（vocabulary.vdk）で読み書きする（初回は DATA_FILE から取り込む）
+USE_BINARY = False
+BINARY_FILE = "vocabulary.vdk"
+
+# クイズの出題予定（単語ごとの箱と次に出す時刻）を記録するファイル
+SCHEDULE_FILE = "vocabulary.schedule.jsonl"
+
+# True にするとボタン・イベントの処理時間とメインループの止まりを測り、終了時に結果を出す
+INSTRUMENT = False
+# 測った結果を JSON で書くファイル（None なら終了時に標準エラーへ表の形で出す）
+INSTRUMENT_FILE = None
+
+# まとめて出題するときの問題数
+SESSION_SIZE = 10
+
+# 保存はまとめて別スレッドで行う（Tkのスレッドでファイルを書かない）
+writer = BackgroundWriter()
+
+# 単語データの読み込み（位置の一覧だけ読み、各単語は必要になったときに読む）
 def load_data():
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return open_deck(BINARY_FILE if USE_BINARY else DATA_FILE, import_path=DATA_FILE)
 
-# 単語データの保存
+# 単語データの保存（変更があれば書き込みスレッドでファイルを書き直す）
 def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    writer.submit(data.save, key=("save", DATA_FILE))
 
 # 単語の追加
 def add_word():
@@ -26,46 +47,146 @@ def add_word():
         meaning = simpledialog.askstring("意味追加", f"{word}の意味を入力してください:")
         if meaning:
             data[word] = meaning
+            search_index.put(data.index_of(word), word, meaning)
             save_data(data)
             messagebox.showinfo("成功", f"「{word}」が追加されました。")
 
+# CSV/TSV（単語,意味）からまとめて取り込む（ファイルは少しずつ読み、保存は最後に1回）
+# 取り込みは作業スレッドで行い、終わるまで進み具合の小窓を出す
+def import_words():
+    path = filedialog.askopenfilename(
+        title="取り込むファイルを選択",
+        filetypes=[("CSV / TSV", "*.csv *.tsv *.txt"), ("すべてのファイル", "*.*")]
+    )
+    if not path:
+        return
+    overwrite = messagebox.askyesno("取り込み", "すでにある単語の意味が違うときは、ファイルの意味で置き換えますか？")
+    dialog = ProgressDialog(root, "取り込み", "ファイルを読んでいます")
+
+    def run(progress):
+        # 書きかけの保存を済ませてから単語帳を書き直す
+        writer.flush()
+        return import_file(data, path, overwrite=overwrite, progress=progress)
+
+    def show_progress(phase, done, total):
+        text = "ファイルを読んでいます" if phase == "read" else "単語帳を書き直しています"
+        dialog.set(text, done / total if total else 1.0)
+
+    def finished(report):
+        global search_index
+        # 番号が増えたので検索の索引は作り直す
+        search_index = SearchIndex(data)
+        threading.Thread(target=search_index.build, daemon=True).start()
+        messagebox.showinfo("取り込み結果", str(report))
+
+    def failed(error):
+        if not isinstance(error, (OSError, ValueError)):
+            raise error
+        messagebox.showerror("エラー", f"ファイルを読み込めませんでした: {error}")
+
+    worker.submit(run, on_done=finished, on_error=failed, on_progress=show_progress, always=dialog.close)
+
 # 単語リストの表示
 def show_words():
     words_window = tk.Toplevel(root)
     words_window.title("単語リスト")
-    st = scrolledtext.ScrolledText(words_window, width=40, height=20)
-    st.pack(padx=10, pady=10)
 
-    if data:
-        for word, meaning in data.items():
-            st.insert(tk.END, f"{word}: {meaning}\n")
-    else:
-        st.insert(tk.END, "単語が登録されていません。")
+    if not data:
+        tk.Label(words_window, text="単語が登録されていません。", width=40).pack(padx=10, pady=10)
+        return
+
+    # 見えている行だけを読み込んで表示する（スクロールした分だけ続きを読む）
+    def fetch(start, stop):
+        return [f"{word}: {meaning}" for word, meaning in data.entries(start, stop)]
+
+    view = VirtualListView(words_window, len(data), fetch, height=20, width=40)
+    view.pack(padx=10, pady=10, fill="both", expand=True)
+
+# 単語の検索（入力するたびに、単語の前方一致と単語・意味の部分一致を表示する）
+def search_words():
+    search_window = tk.Toplevel(root)
+    search_window.title("単語を検索")
+    query = tk.StringVar(search_window)
+    entry = tk.Entry(search_window, textvariable=query, width=40)
+    entry.pack(padx=10, pady=(10, 0))
+    entry.focus_set()
+    result_list = tk.Listbox(search_window, width=40, height=20)
+    result_list.pack(padx=10, pady=10, fill="both", expand=True)
+    results = ListboxView(result_list)
 
-# クイズ機能
+    # 前回の結果との差分だけをリストボックスに反映する
+    def on_change(*args):
+        results.update([(word, f"{word}: {meaning}") for word, meaning in search_index.search(query.get())])
+
+    query.trace_add("write", on_change)
+
+# クイズ機能（出題予定の早い単語から出し、結果で次に出す時刻を決める）
 def quiz():
-    if not data:
+    card = scheduler.next_card()
+    if card is None:
         messagebox.showwarning("エラー", "単語が登録されていません。")
         return
 
-    word = random.choice(list(data.keys()))
+    word, meaning = card
     answer = simpledialog.askstring("クイズ", f"「{word}」の意味は何ですか？")
-    if answer == data[word]:
+    scheduler.answer(word, answer == meaning)
+    if answer == meaning:
         messagebox.showinfo("正解", "正解です！")
     else:
-        messagebox.showinfo("不正解", f"不正解... 正しい意味は「{data[word]}」です。")
+        messagebox.showinfo("不正解", f"不正解... 正しい意味は「{meaning}」です。")
 
-# アプリ終了処理
-def on_closing():
+# まとめてクイズ（SESSION_SIZE 問を先に選んで続けて出し、結果は最後にまとめて記録する）
+def quiz_session():
+    cards = scheduler.next_cards(SESSION_SIZE)
+    if not cards:
+        messagebox.showwarning("エラー", "単語が登録されていません。")
+        return
+
+    results = []
+    mistakes = []
+    for number, (word, meaning) in enumerate(cards, 1):
+        answer = simpledialog.askstring("クイズ", f"（{number}/{len(cards)}）「{word}」の意味は何ですか？")
+        if answer is None:
+            # キャンセルしたらそこで終了（答えた分だけ記録する）
+            break
+        results.append((word, answer == meaning))
+        if answer != meaning:
+            mistakes.append(f"{word}: {meaning}")
+
+    scheduler.answer_all(results)
+    if not results:
+        return
+    summary = f"{len(results)} 問中 {len(results) - len(mistakes)} 問正解です。"
+    if mistakes:
+        summary += "\n\n間違えた単語:\n" + "\n".join(mistakes)
+    messagebox.showinfo("結果", summary)
+
+# 保存を済ませる（作業スレッドで呼ぶ）
+def close_data():
     save_data(data)
-    root.destroy()
+    writer.flush()
+
+# アプリ終了処理（保存が終わるまで画面を隠して待ち、終わったら閉じる）
+def on_closing():
+    root.withdraw()
+    worker.submit(close_data, always=root.destroy)
 
 # メインウィンドウの設定
 root = tk.Tk()
 root.title("単語帳アプリ")
 
+# 時間のかかる読み書きは作業スレッドで行い、結果はメインループで受け取る
+worker = Worker(root)
+
+# INSTRUMENT が True なら、これ以降に登録するコールバックの処理時間を測る
+instrument = Instrument(root).install(INSTRUMENT_FILE) if INSTRUMENT else None
+
 # データの読み込み
 data = load_data()
+scheduler = QuizScheduler(data, SCHEDULE_FILE, writer).load()
+search_index = SearchIndex(data)
+# 検索の索引は起動時に別スレッドで作り始めておく
+threading.Thread(target=search_index.build, daemon=True).start()
 
 # ボタンの配置
 frame = tk.Frame(root)
@@ -74,17 +195,33 @@ frame.pack(padx=20, pady=20)
 btn_add = tk.Button(frame, text="単語を追加", width=20, command=add_word)
 btn_add.grid(row=0, column=0, pady=5)
 
+btn_import = tk.Button(frame, text="ファイルから取り込む", width=20, command=import_words)
+btn_import.grid(row=1, column=0, pady=5)
+
 btn_show = tk.Button(frame, text="単語を表示", width=20, command=show_words)
-btn_show.grid(row=1, column=0, pady=5)
+btn_show.grid(row=2, column=0, pady=5)
+
+btn_search = tk.Button(frame, text="単語を検索", width=20, command=search_words)
+btn_search.grid(row=3, column=0, pady=5)
 
 btn_quiz = tk.Button(frame, text="クイズに挑戦", width=20, command=quiz)
-btn_quiz.grid(row=2, column=0, pady=5)
+btn_quiz.grid(row=4, column=0, pady=5)
+
+btn_session = tk.Button(frame, text=f"まとめてクイズ（{SESSION_SIZE}問）", width=20, command=quiz_session)
+btn_session.grid(row=5, column=0, pady=5)
 
 btn_exit = tk.Button(frame, text="終了", width=20, command=on_closing)
-btn_exit.grid(row=3, column=0, pady=5)
+btn_exit.grid(row=6, column=0, pady=5)
 
 # ウィンドウを閉じるときの処理
 root.protocol("WM_DELETE_WINDOW", on_closing)
 
+# 処理時間を測るときは、コールバックの中で呼ぶ処理も別に数える
+if instrument:
+    instrument.watch(globals(), "save_data")
+    instrument.watch(scheduler, "next_card", "next_cards", "answer", "answer_all")
+    instrument.watch(search_index, "search")
+    instrument.watch(data, "entries")
+
 # メインループの開始
 root.mainloop()
@@ -2,11 +2,25 @@ import tkinter as tk
 from tkinter import messagebox, simpledialog
 from datetime import datetime, timedelta
 from tkcalendar import Calendar
-import json
+from core.reminders import describe_lead
+from core.task_model import Task
+from core.task_store import open_store
+from gui.calendar_marks import CalendarMarks
+from gui.instrument import Instrument
+from gui.list_view import ListboxView
+from gui.reminder_timer import ReminderTimer
+from gui.repeat_dialog import ask_repeat, describe_repeat
+from gui.worker import Worker
 
 # タスクデータを保存するためのファイル名
 DATA_FILE = "tasks_with_calendar.json"
 
+# 締め切りが近いタスクとして一覧に出す日数
+UPCOMING_DAYS = 7
+
+# 締め切りの何分前に知らせるか（1日前・1時間前・締め切りの時刻）
+REMINDER_LEAD_MINUTES = (24 * 60, 60, 0)
+
 # カレンダーダイアログのクラス
 class CalendarDialog(simpledialog.Dialog):
     def __init__(self, master, title=None):
@@ -56,18 +70,26 @@ def select_time():
 
     return f"{hour_var.get()}:{minute_var.get()}"
 
-# タスクデータの読み込み（リスト形式）
-def load_data():
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+# True にするとSQLite（tasks_with_calendar.db）に保存する（初回はJSONから取り込む）
+USE_SQLITE = False
+
+# True にするとタスクサーバー（python -m core.task_server）経由で読み書きする
+# 同じファイルを複数の画面で開いても変更が消えない（サーバーは自動で起動し、画面が無くなると終了する）
+USE_SERVER = False
+# 他の画面での変更を取り込む間隔（ミリ秒、サーバー経由のときだけ）
+REMOTE_POLL_MS = 500
 
-# タスクデータの保存（リスト形式）
-def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+# タスクデータの保存先（リスト形式、変更はジャーナルに追記）
+store = open_store(DATA_FILE, list, use_sqlite=USE_SQLITE, use_server=USE_SERVER)
+
+# True にするとボタン・イベントの処理時間とメインループの止まりを測り、終了時に結果を出す
+INSTRUMENT = False
+# 測った結果を JSON で書くファイル（None なら終了時に標準エラーへ表の形で出す）
+INSTRUMENT_FILE = None
+
+# タスクデータの読み込み（タスクID→タスク）
+def load_data():
+    return store.load()
 
 # カレンダーから締め切りを選択
 def select_date():
@@ -87,39 +109,65 @@ def add_task():
         deadline = f"{deadline_date} {deadline_time}"
 
         # 新しいタスクをリストに追加
-        data.append({"name": task, "completed": False, "deadline": deadline})
-        save_data(data)
-        messagebox.showinfo("成功", f"「{task}」が追加されました（締め切り: {deadline}）。")
+        # 繰り返す場合も規則を1つ保存するだけで、各回は表示する期間の分だけ作る
+        repeat = ask_repeat(root)
+        task_id = store.add(Task(task, False, deadline, repeat=repeat))
+        repeat_text = f"、{describe_repeat(repeat)}" if repeat else ""
+        messagebox.showinfo("成功", f"「{task}」が追加されました（締め切り: {deadline}{repeat_text}）。")
         update_task_list()
-        update_calendar_marks()  # カレンダーのマークを更新
+        update_calendar_marks([task_id])  # 追加したタスクのマークを付ける
+        update_reminders([task_id])
 
 # タスクリストの選択肢を生成（タスク名、締切日、時刻）
 def get_task_choices(include_completed=False):
-    task_choices = []
-    # データを締め切り日でソート（締め切りが早い順）
-    sorted_data = sorted(
-        [task for task in data],
-        key=lambda x: datetime.strptime(x["deadline"], "%Y/%m/%d %H:%M")  # 時刻も含めた形式に変更
-    )
-
-    for task in sorted_data:
-        if not task["completed"] or include_completed:
-            task_choices.append(f"{task['name']} - {task['deadline']}")
-    return task_choices
-
-# 選択されたタスクからタスク名を抽出
-def extract_task_name(selected_task):
-    return selected_task.split(" - ")[0]
-
-# カレンダーのマークを更新
-def update_calendar_marks():
-    for date in calendar.get_calevents():
-        calendar.calevent_remove(date)
-    for task in data:
-        if not task["completed"]:
-            deadline_date = task["deadline"].split(" ")[0]
-            calendar.calevent_create(datetime.strptime(deadline_date, "%Y/%m/%d"), "● " + task['name'], "task")
-    calendar.tag_config("task", foreground="red")
+    # (表示する文字列, タスクID) を締め切りが早い順に
+    return [(f"{task.name} - {task.deadline}", task.id) for task in store.by_deadline(include_completed)]
+
+# カレンダーのマークを更新（task_ids を渡したときはそのタスクの分だけ作り直す）
+# 渡さなければ表示中の月に合わせる（月を切り替えたときもこれを呼ぶ）
+def update_calendar_marks(task_ids=None):
+    if task_ids is None:
+        month, year = calendar.get_displayed_month()
+        calendar_marks.show_month(year, month, store.between)
+        return
+    refresh = False
+    for task_id in task_ids:
+        task = data.get(task_id)
+        if task is None or task.repeat is not None:
+            # 削除したタスクや繰り返すタスクはマークがいくつあるか分からないので、表示中の期間の分を取り直す
+            refresh = True
+        else:
+            calendar_marks.update(task)
+    if refresh:
+        calendar_marks.refresh(store.between)
+
+# 締め切りの通知の予定を更新（task_ids のタスクだけ入れ直し、タイマーを掛け直す）
+def update_reminders(task_ids):
+    for task_id in task_ids:
+        task = data.get(task_id)
+        if task is None:
+            reminder_timer.remove(task_id)  # 削除されたタスク
+        else:
+            reminder_timer.update(task)
+
+# 締め切りが近づいたタスクを知らせる（due は (タスクID, その回の締め切り, 何分前か) の一覧）
+def notify_deadlines(due):
+    lines = [
+        f"「{data[task_id].name}」（{data[task_id].deadline_of(deadline)}）: {describe_lead(lead)}"
+        for task_id, deadline, lead in due if task_id in data
+    ]
+    if lines:
+        root.bell()
+        messagebox.showwarning("締め切りのお知らせ", "\n".join(lines))
+
+# 他の画面での変更を反映する（サーバー経由のときだけ、届いた分を一定間隔で取り込む）
+def apply_remote_changes():
+    changed = store.poll_changes()
+    if changed:
+        update_task_list()
+        update_calendar_marks(changed)
+        update_reminders(changed)
+    root.after(REMOTE_POLL_MS, apply_remote_changes)
 
 # カレンダーの日付をクリックしたときのイベント
 def show_tasks_for_selected_date(event):
@@ -133,35 +181,18 @@ def show_tasks_for_selected_date(event):
     task_text = tk.Text(task_window, wrap="word", height=10, width=40)
     task_text.pack(padx=10, pady=10)
 
-    # タスクをウィジェットに挿入（未完了タスクは赤、完了タスクは青で表示）
-    tasks_for_date = [
-        f"{task['name']} - {task['deadline'].split()[1]} - {'完了' if task['completed'] else '未完了'}"
-        for task in data if task["deadline"].startswith(selected_date)
-    ]
+    # 未完了タスクの文字色を赤、完了済みタスクの文字色を青に設定
+    task_text.tag_config("incomplete", foreground="red")
+    task_text.tag_config("completed", foreground="blue")
 
-    if tasks_for_date:
-        for task in tasks_for_date:
-            if "未完了" in task:
-                task_text.insert("end", task + "\n", "incomplete")
-            else:
-                task_text.insert("end", task + "\n", "completed")
-        # 未完了タスクの文字色を赤に設定
-        task_text.tag_config("incomplete", foreground="red")
-        # 完了済みタスクの文字色を青に設定
-        task_text.tag_config("completed", foreground="blue")
-    else:
-        task_text.insert("end", "この日にタスクはありません。")
-
-    task_text.config(state="disabled")  # テキストを編集不可に
+    # その日のタスクだけを日付の表から取り出し、(文字列, タグ) を並べて1回で挿入する
+    chunks = []
+    for task in store.on_date(selected_date):
+        status = "完了" if task.completed else "未完了"
+        chunks += [f"{task.name} - {task.deadline.split()[1]} - {status}\n", "completed" if task.completed else "incomplete"]
 
-    if tasks_for_date:
-        for task in tasks_for_date:
-            if "未完了" in task:
-                task_text.insert("end", task + "\n", "incomplete")
-            else:
-                task_text.insert("end", task + "\n")
-        # 未完了タスクの文字色を赤に設定
-        task_text.tag_config("incomplete", foreground="red")
+    if chunks:
+        task_text.insert("end", *chunks)
     else:
         task_text.insert("end", "この日にタスクはありません。")
 
@@ -169,21 +200,15 @@ def show_tasks_for_selected_date(event):
 
 
 # 締め切りが近いタスクリストを表示
-def update_task_list():
-    root.task_list.delete(0, tk.END)
+def update_task_list(days=UPCOMING_DAYS):
     today = datetime.today()
-    upcoming_deadline = today + timedelta(days=7)
+    upcoming_deadline = today + timedelta(days=days)
 
-    # データを締め切り日でソート（締め切りが早い順）
-    sorted_data = sorted(
-        [task for task in data if not task["completed"]],
-        key=lambda x: datetime.strptime(x["deadline"], "%Y/%m/%d %H:%M")
-    )
-
-    for task in sorted_data:
-        deadline = datetime.strptime(task["deadline"], "%Y/%m/%d %H:%M")
-        if deadline <= upcoming_deadline and not task["completed"]:
-            root.task_list.insert(tk.END, f"{task['name']} - 未完了（締め切り: {task['deadline']}）")
+    # 締め切りが days 日以内の未完了タスク（締め切りが早い順、該当する分だけ取り出す）
+    # 表示中の一覧との差分だけをリストボックスに反映する
+    root.task_view.update([
+        (task.key, f"{task.name} - 未完了（締め切り: {task.deadline}）") for task in store.upcoming(upcoming_deadline)
+    ])
 
 # タスクの完了と削除
 def complete_task():
@@ -192,50 +217,75 @@ def complete_task():
     complete_window.geometry("300x250")
     
     selected_task = tk.StringVar(complete_window)
+    selected_id = tk.IntVar(complete_window)
     task_choices = get_task_choices()
-    selected_task.set(task_choices[0] if task_choices else "タスクなし")
-    task_menu = tk.OptionMenu(complete_window, selected_task, *task_choices)
+    selected_task.set(task_choices[0][0] if task_choices else "タスクなし")
+    selected_id.set(task_choices[0][1] if task_choices else 0)
+    task_menu = tk.OptionMenu(complete_window, selected_task, *[label for label, task_id in task_choices])
     task_menu.pack(pady=10)
 
+    # 同じ名前のタスクがあっても区別できるよう、選んだ項目のタスクIDを覚えておく
+    for i, (label, task_id) in enumerate(task_choices):
+        task_menu["menu"].entryconfigure(
+            i, command=lambda label=label, task_id=task_id: (selected_task.set(label), selected_id.set(task_id))
+        )
+
     # タスク完了後に削除するかどうかを選択するチェックボックス
     delete_after_complete = tk.BooleanVar()
     delete_check = tk.Checkbutton(complete_window, text="完了後に削除", variable=delete_after_complete)
     delete_check.pack(pady=10)
 
     def confirm_complete():
-        task_text = selected_task.get()
-        task_name = extract_task_name(task_text)
-        
-        # リストから該当タスクを見つけて処理
-        for task in data:
-            if task["name"] == task_name:
-                task["completed"] = True
-                if delete_after_complete.get():
-                    data.remove(task)
-                    messagebox.showinfo("完了と削除", f"「{task_name}」が完了し、削除されました。")
-                else:
-                    messagebox.showinfo("完了", f"「{task_name}」が完了になりました。")
-                save_data(data)
-                update_task_list()
-                update_calendar_marks()  # カレンダーのマークを更新
-                complete_window.destroy()
-                break
-        else:
+        # 選んだタスクをIDで直接取り出して処理
+        task = store.get(selected_id.get())
+        if task is None:
             messagebox.showwarning("エラー", "そのタスクは存在しません。")
+            return
+
+        # 繰り返すタスクはまだ完了していない次の回だけを完了にする
+        # （保存できなかったときに表示中のタスクが変わらないよう、写しを完了にして渡す）
+        changed = task.copy()
+        done = changed.complete()
+        try:
+            if delete_after_complete.get():
+                store.remove(task.id)
+            else:
+                store.update(changed)
+        except (KeyError, ConnectionError, TimeoutError):
+            # 他の画面で削除された・サーバーとつながらないときは、今の状態を表示し直す
+            messagebox.showwarning("エラー", f"「{task.name}」を保存できませんでした。")
+            update_task_list()
+            update_calendar_marks([task.id])
+            update_reminders([task.id])
+            return
+        if delete_after_complete.get():
+            messagebox.showinfo("完了と削除", f"「{task.name}」が完了し、削除されました。")
+        else:
+            messagebox.showinfo("完了", f"「{task.name}」（{done.deadline}）が完了になりました。")
+        update_task_list()
+        update_calendar_marks([task.id])  # 完了したタスクのマークを外す
+        update_reminders([task.id])
+        complete_window.destroy()
 
     complete_button = tk.Button(complete_window, text="完了", command=confirm_complete)
     complete_button.pack(pady=5)
 
-# アプリ終了処理
+# アプリ終了処理（ジャーナルの反映が終わるまで画面を隠して待ち、終わったら閉じる）
 def on_closing():
-    save_data(data)
-    root.destroy()
+    root.withdraw()
+    worker.submit(store.close, always=root.destroy)
 
 # メインウィンドウの設定
 root = tk.Tk()
 root.title("タスク管理アプリ")
 root.geometry("600x800")
 
+# ストアの閉じる処理などは作業スレッドで行い、結果はメインループで受け取る
+worker = Worker(root)
+
+# INSTRUMENT が True なら、これ以降に登録するコールバックの処理時間を測る
+instrument = Instrument(root).install(INSTRUMENT_FILE) if INSTRUMENT else None
+
 # データの読み込み
 data = load_data()
 
@@ -250,7 +300,10 @@ calendar = Calendar(
     height=5   # カレンダーの高さを拡張
 )
 calendar.pack(pady=20)
-update_calendar_marks()  # カレンダーのマークを初期設定
+calendar_marks = CalendarMarks(calendar)
+# マークは表示中の月の分だけを、最初の画面を描いたあとに付ける
+root.after_idle(update_calendar_marks)
+calendar.bind("<<CalendarMonthChanged>>", lambda event: update_calendar_marks())
 
 # カレンダーの日付をクリックした際にその日のタスクを表示
 calendar.bind("<<CalendarSelected>>", show_tasks_for_selected_date)
@@ -258,9 +311,18 @@ calendar.bind("<<CalendarSelected>>", show_tasks_for_selected_date)
 # 締め切りが近いタスクを表示するリストボックス
 root.task_list = tk.Listbox(root, selectmode="multiple", bd=10)
 root.task_list.pack(fill="both", expand=True, padx=20, pady=(10, 0))
+root.task_view = ListboxView(root.task_list)
 
 update_task_list()
 
+# 締め切りの通知（予定はヒープに持ち、次に知らせる時刻にだけタイマーを掛ける）
+reminder_timer = ReminderTimer(root, notify_deadlines, REMINDER_LEAD_MINUTES)
+root.after_idle(lambda: reminder_timer.load(data.values()))
+
+# サーバー経由なら他の画面での変更を取り込み続ける
+if USE_SERVER:
+    root.after(REMOTE_POLL_MS, apply_remote_changes)
+
 # ボタンの配置
 frame = tk.Frame(root)
 frame.pack(pady=10)
@@ -277,5 +339,10 @@ btn_exit.grid(row=5, column=0, pady=5)
 # ウィンドウを閉じるときの処理
 root.protocol("WM_DELETE_WINDOW", on_closing)
 
+# 処理時間を測るときは、コールバックの中で呼ぶ処理も別に数える
+if instrument:
+    instrument.watch(globals(), "update_task_list", "update_calendar_marks", "get_task_choices")
+    instrument.watch(store, "add", "update", "remove", "upcoming", "between")
+
 # メインループの開始
 root.mainloop()
@@ -0,0 +1 @@
+# 処理時間の計測（python -m benchmarks.run）
@@ -0,0 +1,50 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+from core.task_model import DATETIME_FORMAT
+
+# 締め切りをばらまく期間（基準日の前後の日数）
+DEADLINE_SPREAD_DAYS = 3 * 365
+
+# 完了済みにするタスクの割合
+COMPLETED_RATIO = 0.3
+
+
+# n 件のタスク（保存形式の辞書）を作る（seed が同じなら同じ内容）
+def generate_tasks(n, seed=0, base=None):
+    rng = random.Random(seed)
+    base = base or datetime(2026, 1, 1)
+    tasks = []
+    for i in range(n):
+        due = base + timedelta(days=rng.randrange(-DEADLINE_SPREAD_DAYS, DEADLINE_SPREAD_DAYS), minutes=rng.randrange(24 * 60))
+        tasks.append({
+            "id": i + 1,
+            "name": f"タスク{i}",
+            "completed": rng.random() < COMPLETED_RATIO,
+            "deadline": due.strftime(DATETIME_FORMAT),
+        })
+    return tasks
+
+
+# n 件の (単語, 意味) を作る（単語は重ならない）
+def generate_words(n, seed=0):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    kana = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+    for i in range(n):
+        word = "".join(rng.choice(letters) for _ in range(rng.randint(3, 8))) + str(i)
+        meaning = "".join(rng.choice(kana) for _ in range(rng.randint(2, 10)))
+        yield word, meaning
+
+
+# タスクのスナップショット（TaskStore が読む形式）を書く
+def write_task_file(path, n, seed=0):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"__journal_seq__": 0, "data": generate_tasks(n, seed)}, file, ensure_ascii=False)
+
+
+# 単語帳（vocabulary.json と同じ形式）を書く
+def write_word_file(path, n, seed=0):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(dict(generate_words(n, seed)), file, ensure_ascii=False, indent=4)
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.generate import write_task_file, write_word_file
+from core.background_writer import BackgroundWriter
+from core.quiz_scheduler import QuizScheduler
+from core.task_model import Task
+from core.task_store import SqliteTaskStore, TaskStore
+from core.vocab_search import SearchIndex
+from core.vocab_store import BINARY_SUFFIX, convert_deck, open_deck
+from gui.calendar_marks import CalendarMarks
+
+# 既定で測る件数（1000000 は --sizes で指定したときだけ）
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# 1つの処理を何回測るか（結果には最小値と中央値を出す）
+DEFAULT_REPEAT = 5
+
+# 締め切りが近いタスクの日数（アプリの UPCOMING_DAYS と同じ）
+UPCOMING_DAYS = 7
+
+# 生成したタスクの基準日（この日を「今日」として問い合わせる）
+TODAY = datetime(2026, 1, 1)
+
+# 保存先はすべてこの書き込みスレッドを使う（一時ディレクトリを消す前に書き終える）
+writer = BackgroundWriter()
+
+
+# tkcalendar の代わりにマークの数だけを数えるカレンダー（マークを決める計算だけを測る）
+class _CountingCalendar:
+    def __init__(self):
+        self.events = 0
+        self._next_id = 0
+
+    def tag_config(self, tag, **options):
+        pass
+
+    def calevent_create(self, day, text, tag):
+        self.events += 1
+        self._next_id += 1
+        return self._next_id
+
+    def calevent_remove(self, event_id):
+        self.events -= 1
+
+
+# func を repeat 回実行して秒数の一覧を返す（setup は毎回の前に呼び、その戻り値を func に渡す）
+def measure(func, repeat, setup=None):
+    seconds = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state) if setup else func()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def bench_tasks(size, directory, repeat, record):
+    path = os.path.join(directory, f"tasks_{size}.json")
+    write_task_file(path, size)
+
+    def open_store():
+        store = TaskStore(path, writer=writer)
+        store.load()
+        return store
+
+    record("tasks.load", size, measure(open_store, repeat))
+    store = open_store()
+    record("tasks.save", size, measure(lambda: store.compact(wait=True), repeat))
+    record("tasks.add_one", size, measure(lambda: store.add(Task("追加", False, "2026/01/02 10:00")), repeat))
+    until = TODAY + timedelta(days=UPCOMING_DAYS)
+    record("tasks.upcoming", size, measure(lambda: store.upcoming(until), repeat))
+    # get_task_choices と同じ選択肢の作り方
+    record("tasks.choices", size, measure(
+        lambda: [(f"{task.name} - {task.deadline}", task.id) for task in store.by_deadline()], repeat
+    ))
+    record("tasks.on_date", size, measure(lambda: store.on_date("2026/01/01"), repeat))
+    record("tasks.calendar_month", size, measure(
+        lambda marks: marks.show_month(TODAY.year, TODAY.month, store.between),
+        repeat, setup=lambda: CalendarMarks(_CountingCalendar())
+    ))
+    store.close()
+
+    # SQLite 版（初回の取り込みは除き、開き直す時間と問い合わせを測る）
+    sqlite_store = SqliteTaskStore(os.path.join(directory, f"tasks_{size}.db"), import_path=path)
+    sqlite_store.load()
+    sqlite_store.close()
+
+    def open_sqlite():
+        store = SqliteTaskStore(sqlite_store.path)
+        store.load()
+        return store
+
+    record("sqlite.load", size, measure(open_sqlite, repeat))
+    store = open_sqlite()
+    record("sqlite.upcoming", size, measure(lambda: store.upcoming(until), repeat))
+    store.close()
+
+
+def bench_words(size, directory, repeat, record):
+    path = os.path.join(directory, f"vocabulary_{size}.json")
+    write_word_file(path, size)
+
+    # 位置の一覧（.idx）を作るところから
+    def remove_index():
+        if os.path.exists(path + ".idx"):
+            os.remove(path + ".idx")
+
+    record("deck.open_cold", size, measure(lambda state: open_deck(path), repeat, setup=remove_index))
+    record("deck.open", size, measure(lambda: open_deck(path), repeat))
+    deck = open_deck(path)
+
+    def change_one():
+        deck["追加"] = str(time.perf_counter())
+
+    record("deck.save", size, measure(lambda state: deck.save(), repeat, setup=change_one))
+
+    binary_path = os.path.join(directory, f"vocabulary_{size}{BINARY_SUFFIX}")
+    convert_deck(path, binary_path)
+    record("deck.binary_open", size, measure(lambda: open_deck(binary_path).close(), repeat))
+
+    # 出題の選び方（1問ずつ100問、まとめて10問）
+    schedule_path = os.path.join(directory, f"schedule_{size}.jsonl")
+
+    def new_scheduler():
+        writer.flush()
+        if os.path.exists(schedule_path):
+            os.remove(schedule_path)
+        return QuizScheduler(deck, schedule_path, writer).load()
+
+    def quiz_100(scheduler):
+        now = 0.0
+        for i in range(100):
+            word, meaning = scheduler.next_card(now)
+            scheduler.answer(word, i % 3 != 0, now)
+            now += 30.0
+
+    record("quiz.next_card_x100", size, measure(quiz_100, repeat, setup=new_scheduler))
+    record("quiz.session_10", size, measure(
+        lambda scheduler: scheduler.answer_all([(word, True) for word, meaning in scheduler.next_cards(10, 0.0)], 0.0),
+        repeat, setup=new_scheduler
+    ))
+
+    index = SearchIndex(deck)
+    record("search.build", size, measure(index.build, 1))
+    record("search.query", size, measure(lambda: (index.search("ab"), index.search("かき")), repeat))
+    writer.flush()
+    deck.close()
+
+
+# 以前の結果と比べて、最小値の比（今回 / 以前）を表示する
+def compare(baseline_path, results):
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(item["name"], item["size"]): item for item in json.load(file)["results"]}
+    print(f"\n--- {baseline_path} との比較（今回 / 以前） ---", file=sys.stderr)
+    for item in results:
+        old = baseline.get((item["name"], item["size"]))
+        if old and old["min"] > 0:
+            print(f"{item['name']:24} {item['size']:>9}  {item['min'] / old['min']:6.2f}x", file=sys.stderr)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="タスク・単語帳の処理時間を測って JSON で出力する")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="件数（例: 1000 10000 100000 1000000）")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="1つの処理を測る回数")
+    parser.add_argument("--only", choices=("tasks", "words"), help="タスクか単語帳の片方だけ測る")
+    parser.add_argument("--output", help="結果の JSON を書くファイル（省略時は標準出力）")
+    parser.add_argument("--baseline", help="以前の結果の JSON（指定すると処理ごとの比を表示する）")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    def record(name, size, seconds):
+        results.append({
+            "name": name,
+            "size": size,
+            "min": min(seconds),
+            "median": sorted(seconds)[len(seconds) // 2],
+            "runs": len(seconds),
+        })
+        print(f"{name:24} {size:>9}  {min(seconds) * 1000:10.3f} ms", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            if args.only != "words":
+                bench_tasks(size, directory, args.repeat, record)
+            if args.only != "tasks":
+                bench_words(size, directory, args.repeat, record)
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    if args.baseline:
+        compare(args.baseline, results)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+# 例: python -m benchmarks.run --sizes 1000 10000 --output bench.json
+if __name__ == "__main__":
+    main()
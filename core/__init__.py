@@ -0,0 +1,3 @@
+# タスク管理・単語帳の画面を持たない部分（データの形、保存、検索、クイズの出題）
+# tkinter / tkcalendar は読み込まないので、スクリプトや一括処理からそのまま使える
+# 使う側は必要なモジュールだけを読み込む（例: from core.vocab_store import open_deck）
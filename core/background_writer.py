@@ -0,0 +1,118 @@
+import atexit
+import json
+import os
+import threading
+import time
+import traceback
+
+# 保存の依頼が途切れてから実際に書き込むまでの待ち時間（秒）
+DEBOUNCE_DELAY = 0.5
+
+
+# JSONを一時ファイルに書いてから置き換える（途中で落ちても元のファイルは壊れない）
+def atomic_write_json(path, obj):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(obj, file, ensure_ascii=False, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+# JSONの読み込み（壊れたファイルは .corrupt に退避してから空のデータを返す）
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default()
+    except json.JSONDecodeError:
+        # そのまま空で上書きするとデータが消えるので、手で直せるよう残しておく
+        os.replace(path, path + ".corrupt")
+        return default()
+
+
+# ファイルへの書き込みを別スレッドで順番に行う
+# 短い間に続いた保存はまとめて1回にし、追記は連続するものを1回で書く
+class BackgroundWriter:
+    def __init__(self, delay=DEBOUNCE_DELAY):
+        self.delay = delay
+        self._jobs = []
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flushing = False
+        self._last_submit = 0.0
+        self._thread = None
+        atexit.register(self.flush)
+
+    # path をJSONで丸ごと書き直す（まだ書いていない同じ path の保存は捨てる）
+    def save_json(self, path, obj):
+        self.submit(lambda: atomic_write_json(path, obj), key=("json", path))
+
+    # path の末尾に text を追記する
+    def append_text(self, path, text):
+        with self._cond:
+            if self._jobs and self._jobs[-1][0] == ("append", path):
+                self._jobs[-1][2].append(text)
+                self._wake()
+                return
+            self._jobs.append((("append", path), None, [text]))
+            self._wake()
+
+    # 任意の書き込み処理を順番待ちに入れる（key が同じ未実行の処理は置き換える）
+    def submit(self, func, key=None):
+        with self._cond:
+            if key is not None:
+                self._jobs = [job for job in self._jobs if job[0] != key]
+            self._jobs.append((key, func, None))
+            self._wake()
+
+    # 溜まっている書き込みをすぐに行い、終わるまで待つ
+    def flush(self):
+        with self._cond:
+            if self._thread is None:
+                return
+            self._flushing = True
+            self._cond.notify_all()
+            while self._jobs or self._busy:
+                self._cond.wait()
+            self._flushing = False
+
+    def _wake(self):
+        self._last_submit = time.monotonic()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs:
+                    self._cond.wait()
+                # 依頼が続いている間は待ってまとめる
+                while not self._flushing:
+                    remaining = self._last_submit + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                jobs, self._jobs = self._jobs, []
+                self._busy = True
+            for key, func, texts in jobs:
+                try:
+                    if func is None:
+                        _append(key[1], "".join(texts))
+                    else:
+                        func()
+                except Exception:
+                    traceback.print_exc()
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
@@ -0,0 +1,418 @@
+import argparse
+import asyncio
+import json
+import re
+import signal
+import threading
+import traceback
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .background_writer import BackgroundWriter
+from .quiz_scheduler import QuizScheduler
+from .task_model import Recurrence, Task
+from .task_store import open_store
+from .vocab_search import SEARCH_LIMIT, SearchIndex
+from .vocab_store import open_deck
+
+# 待ち受けるアドレス（同じマシンの中からだけつなげる）
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+
+# 何もしないままつながっている接続を切るまでの秒数
+KEEPALIVE_TIMEOUT = 60.0
+
+# 受け付ける本文の大きさの上限（バイト）
+MAX_BODY = 1024 * 1024
+
+# 締め切りが近いタスクとして返す日数の既定値
+UPCOMING_DAYS = 7
+
+# まとめて出題する問題数の既定値と上限
+SESSION_SIZE = 10
+MAX_SESSION_SIZE = 100
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+# 要求を受け付けられないとき（status の応答を返す）
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# 書き込みをまとめて確定する
+# 変更した要求は flush が終わってから応答を返すが、前の flush を待っている間に来た変更は次の1回にまとめる
+class GroupCommit:
+    def __init__(self, flush):
+        self._flush = flush
+        self._pending = None
+        self._lock = asyncio.Lock()
+        self._tasks = set()
+
+    async def wait(self):
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_future()
+            task = asyncio.create_task(self._run(self._pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        await asyncio.shield(self._pending)
+
+    async def _run(self, future):
+        async with self._lock:
+            # ここから後に来た変更は次の回にする
+            self._pending = None
+            try:
+                await asyncio.to_thread(self._flush)
+            except Exception as error:
+                future.set_exception(error)
+                return
+        future.set_result(None)
+
+
+# タスクと単語帳を読み書きする HTTP/JSON の API
+# 1つの接続で続けて要求を送れる（keep-alive）。タスクの要求はイベントループの上で1つずつ反映する
+# ファイルへの書き込みは1つの BackgroundWriter にまとめ、GroupCommit で同じ時期の変更を1回で確定する
+class TaskApi:
+    def __init__(self, store, deck, scheduler, writer):
+        self.store = store
+        self.deck = deck
+        self.scheduler = scheduler
+        self.writer = writer
+        self.search_index = SearchIndex(deck)
+        self.commit = GroupCommit(writer.flush)
+        # つながっている接続の StreamWriter → それを処理しているタスク
+        self.connections = {}
+        # タスクサーバー経由の保存先（RemoteTaskStore）は応答を待つ間ブロックするので、
+        # 要求はイベントループを止めないよう別スレッドで1件ずつ処理する
+        self.remote = hasattr(store, "poll_changes")
+        self._serial = asyncio.Lock()
+        # 単語帳は項目をファイルから読み、検索は索引を作り終わるまで待つので、
+        # 単語帳・クイズの要求も別スレッドで1件ずつ処理する
+        self._deck_serial = asyncio.Lock()
+        # (メソッド, パスの正規表現, 処理, 書き込むか, 単語帳を使うか)
+        self.routes = [
+            ("GET", r"/tasks", self.list_tasks, False, False),
+            ("POST", r"/tasks", self.create_task, True, False),
+            ("GET", r"/tasks/upcoming", self.upcoming_tasks, False, False),
+            ("GET", r"/tasks/(\d+)", self.get_task, False, False),
+            ("PATCH", r"/tasks/(\d+)", self.update_task, True, False),
+            ("PUT", r"/tasks/(\d+)", self.update_task, True, False),
+            ("DELETE", r"/tasks/(\d+)", self.delete_task, True, False),
+            ("POST", r"/tasks/(\d+)/complete", self.complete_task, True, False),
+            ("GET", r"/days/(\d{4}-\d{2}-\d{2})", self.tasks_on_day, False, False),
+            ("GET", r"/words", self.search_words, False, True),
+            ("POST", r"/words", self.add_word, True, True),
+            ("GET", r"/words/([^/]+)", self.get_word, False, True),
+            ("GET", r"/quiz", self.quiz_cards, False, True),
+            ("POST", r"/quiz/answers", self.answer_quiz, True, True),
+        ]
+        self.routes = [
+            (method, re.compile(pattern), handler, writes, deck)
+            for method, pattern, handler, writes, deck in self.routes
+        ]
+
+    # 1つの接続の要求を順に処理する
+    async def handle(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+                except ValueError:
+                    _respond(writer, 400, {"error": "bad request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    _respond(writer, 413, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, body)
+                _respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            del self.connections[writer]
+            writer.close()
+
+    # つながっている接続をすべて切り、処理が終わるまで待つ
+    async def close(self):
+        tasks = list(self.connections.values())
+        for writer in list(self.connections):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # 要求1件を処理して (ステータス, 返す JSON) を返す
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        allowed = False
+        for route_method, pattern, handler, writes, deck in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match is None:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                args = [unquote(group) for group in match.groups()]
+                if deck:
+                    async with self._deck_serial:
+                        status, payload = await asyncio.to_thread(handler, query, data, *args)
+                elif self.remote:
+                    async with self._serial:
+                        status, payload = await asyncio.to_thread(self._call_remote, handler, query, data, args)
+                else:
+                    status, payload = handler(query, data, *args)
+                if writes:
+                    await self.commit.wait()
+                return status, payload
+            except HttpError as error:
+                return error.status, {"error": str(error)}
+            except json.JSONDecodeError:
+                return 400, {"error": "body is not JSON"}
+            except ValueError as error:
+                return 400, {"error": str(error)}
+            except Exception:
+                traceback.print_exc()
+                return 500, {"error": "internal error"}
+        if allowed:
+            return 405, {"error": f"{method} is not allowed"}
+        return 404, {"error": "not found"}
+
+    # 他の画面での変更を取り込んでから処理する（作業スレッドで呼ばれる）
+    def _call_remote(self, handler, query, data, args):
+        self.store.poll_changes()
+        return handler(query, data, *args)
+
+    # GET /tasks（?completed=1 で完了済みも、?offset= ?limit= で範囲を指定）
+    def list_tasks(self, query, data):
+        tasks = self.store.by_deadline(_flag(query, "completed"))
+        offset = _int(query, "offset", 0)
+        limit = _int(query, "limit", len(tasks))
+        return 200, {"count": len(tasks), "tasks": [task.to_dict() for task in tasks[offset:offset + limit]]}
+
+    # POST /tasks {"name", "deadline", "completed", "repeat"}
+    # repeat は {"freq": "daily" / "weekly" / "monthly", "interval", "until", "count"}（繰り返さないなら省く）
+    def create_task(self, query, data):
+        name = _field(data, "name")
+        deadline = _field(data, "deadline")
+        try:
+            task = Task(name, bool(data.get("completed", False)), deadline)
+        except ValueError:
+            raise HttpError(400, f"bad deadline {deadline!r}") from None
+        task.repeat = _repeat(data.get("repeat"))
+        self.store.add(task)
+        return 201, task.to_dict()
+
+    # GET /tasks/upcoming（?days= 日以内、?completed=1 で完了済みも）
+    def upcoming_tasks(self, query, data):
+        until = datetime.now() + timedelta(days=_int(query, "days", UPCOMING_DAYS))
+        tasks = self.store.upcoming(until, _flag(query, "completed"))
+        return 200, {"count": len(tasks), "tasks": [task.to_dict() for task in tasks]}
+
+    def get_task(self, query, data, task_id):
+        return 200, self._task(task_id).to_dict()
+
+    # PATCH /tasks/<id>（name / deadline / completed / repeat のうち送ったものだけ書き換える）
+    def update_task(self, query, data, task_id):
+        task = self._task(task_id)
+        # 締め切りの解釈に失敗したときや保存先に断られたときに途中まで書き換わらないよう、写しに加えて渡す
+        self.store.update(_task_from(data, task.copy()))
+        return 200, task.to_dict()
+
+    # POST /tasks/<id>/complete（繰り返すタスクはまだ完了していない次の回だけを完了にする）
+    def complete_task(self, query, data, task_id):
+        task = self._task(task_id)
+        changed = task.copy()
+        done = changed.complete()
+        self.store.update(changed)
+        return 200, {"task": task.to_dict(), "completed": done.to_dict()}
+
+    def delete_task(self, query, data, task_id):
+        self.store.remove(self._task(task_id).id)
+        return 204, None
+
+    # GET /days/yyyy-mm-dd（その日が締め切りのタスクを時刻順に）
+    def tasks_on_day(self, query, data, day):
+        tasks = self.store.on_date(day.replace("-", "/"))
+        return 200, {"count": len(tasks), "tasks": [task.to_dict() for task in tasks]}
+
+    # GET /words?q=（前方一致・部分一致）
+    def search_words(self, query, data):
+        words = self.search_index.search(query.get("q", ""), _int(query, "limit", SEARCH_LIMIT))
+        return 200, {"words": [{"word": word, "meaning": meaning} for word, meaning in words]}
+
+    # POST /words {"word", "meaning"}（同じ単語があれば意味を書き換える）
+    def add_word(self, query, data):
+        word = _field(data, "word").strip()
+        meaning = _field(data, "meaning").strip()
+        if not word:
+            raise HttpError(400, "word is empty")
+        self.deck[word] = meaning
+        self.search_index.put(self.deck.index_of(word), word, meaning)
+        self.writer.submit(self.deck.save, key=("save", self.deck.path))
+        return 201, {"word": word, "meaning": meaning}
+
+    def get_word(self, query, data, word):
+        try:
+            return 200, {"word": word, "meaning": self.deck[word]}
+        except KeyError:
+            raise HttpError(404, f"no word {word!r}") from None
+
+    # GET /quiz?count=（次に出す単語をまとめて）
+    def quiz_cards(self, query, data):
+        count = min(_int(query, "count", SESSION_SIZE), MAX_SESSION_SIZE)
+        return 200, {"cards": [{"word": word, "meaning": meaning} for word, meaning in self.scheduler.next_cards(count)]}
+
+    # POST /quiz/answers {"results": [{"word", "correct"}, ...]}
+    def answer_quiz(self, query, data):
+        if not isinstance(data, dict):
+            raise HttpError(400, "body must be an object")
+        results = data.get("results")
+        if not isinstance(results, list):
+            raise HttpError(400, "results must be a list")
+        try:
+            pairs = [(str(result["word"]), bool(result["correct"])) for result in results]
+        except (KeyError, TypeError):
+            raise HttpError(400, "each result needs word and correct") from None
+        self.scheduler.answer_all(pairs)
+        return 200, {"answered": len(pairs)}
+
+    def _task(self, task_id):
+        task = self.store.get(int(task_id))
+        if task is None:
+            raise HttpError(404, f"no task {task_id}")
+        return task
+
+
+# data の name / deadline / completed / repeat を task に反映する（締め切りや繰り返しが読めなければ 400）
+def _task_from(data, task):
+    if not isinstance(data, dict):
+        raise HttpError(400, "body must be an object")
+    try:
+        if "name" in data:
+            task.name = str(data["name"])
+        if "deadline" in data:
+            task.deadline = str(data["deadline"])
+        if "completed" in data:
+            task.completed = bool(data["completed"])
+    except ValueError:
+        raise HttpError(400, f"bad deadline {data['deadline']!r}") from None
+    if "repeat" in data:
+        task.repeat = _repeat(data["repeat"])
+    return task
+
+
+# 送られた繰り返しの規則（null や省略なら繰り返さない）
+def _repeat(value):
+    if value is None:
+        return None
+    try:
+        return Recurrence.from_dict(value)
+    except (KeyError, TypeError, ValueError):
+        raise HttpError(400, f"bad repeat {value!r}") from None
+
+
+def _field(data, name):
+    if not isinstance(data, dict) or not isinstance(data.get(name), str):
+        raise HttpError(400, f"{name} is required")
+    return data[name]
+
+
+def _int(query, name, default):
+    try:
+        return max(int(query.get(name, default)), 0)
+    except ValueError:
+        raise HttpError(400, f"{name} must be an integer") from None
+
+
+def _flag(query, name):
+    return query.get(name, "0").lower() in ("1", "true", "yes")
+
+
+def _respond(writer, status, payload, keep_alive):
+    body = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        f"Content-Length: {len(body)}",
+        "Connection: " + ("keep-alive" if keep_alive else "close"),
+    ]
+    if payload is not None:
+        head.append("Content-Type: application/json; charset=utf-8")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+
+
+# 保存先を開いて API を動かす（止めるまで）
+async def run_api(tasks_path, deck_path, schedule_path, empty=list, use_sqlite=False, use_server=False,
+                  host=API_HOST, port=API_PORT):
+    writer = BackgroundWriter()
+    store = open_store(tasks_path, empty, use_sqlite=use_sqlite, use_server=use_server, writer=writer)
+    store.load()
+    deck = open_deck(deck_path)
+    scheduler = QuizScheduler(deck, schedule_path, writer).load()
+    api = TaskApi(store, deck, scheduler, writer)
+    # 検索の索引は別スレッドで作っておく（作り終わる前の検索は終わるまで待つ）
+    threading.Thread(target=api.search_index.build, daemon=True).start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows では Ctrl+C の KeyboardInterrupt で止まる
+    listener = await asyncio.start_server(api.handle, host, port)
+    try:
+        async with listener:
+            await stop.wait()
+            await api.close()
+    finally:
+        store.close()
+        writer.submit(deck.save, key=("save", deck.path))
+        scheduler.close()
+        deck.close()
+
+
+# 例: python -m core.http_api --port 8765
+#     curl -X POST localhost:8765/tasks -d '{"name": "レポート", "deadline": "2026/01/31 17:00"}'
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="タスクと単語帳を読み書きする HTTP/JSON の API")
+    parser.add_argument("--tasks", default="tasks_with_calendar.json", help="タスクデータのファイル")
+    parser.add_argument("--deck", default="vocabulary.json", help="単語帳のファイル")
+    parser.add_argument("--schedule", default="vocabulary.schedule.jsonl", help="クイズの出題予定のファイル")
+    parser.add_argument("--dict", action="store_true", help="新しく作るタスクのファイルを辞書形式にする")
+    parser.add_argument("--sqlite", action="store_true", help="タスクを SQLite（同名の .db）に保存する")
+    parser.add_argument("--use-server", action="store_true", help="タスクはタスクサーバー経由で読み書きする")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_api(
+            args.tasks, args.deck, args.schedule, dict if args.dict else list,
+            args.sqlite, args.use_server, args.host, args.port
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,208 @@
+import heapq
+import json
+import os
+import random
+import time
+
+from .background_writer import BackgroundWriter
+
+# Leitner 方式の箱ごとの次の出題までの間隔（秒）
+# 間違えると箱0（1分後にもう一度）、正解するたびに次の箱へ進む
+BOX_INTERVALS = (60, 24 * 60 * 60, 3 * 24 * 60 * 60, 7 * 24 * 60 * 60, 14 * 24 * 60 * 60, 30 * 24 * 60 * 60)
+
+# 記録の行数が単語数のこの倍を超えたら、最新の状態だけに書き直す
+COMPACT_RATIO = 2
+
+
+# 単語帳のクイズの出題順を決める
+# 出題した単語ごとに (単語帳の番号, 箱, 次に出す時刻) を持ち、次に出す時刻のヒープから選ぶ
+# まだ出していない単語は単語帳の先頭から順に加えるので、単語帳全体を読むことはない
+# 状態は単語帳とは別のファイルに1回答1行で追記する（単語帳は書き直さない）
+class QuizScheduler:
+    def __init__(self, deck, path, writer=None):
+        self.deck = deck
+        self.path = path
+        # 単語 → [単語帳の番号, 箱, 次に出す時刻]
+        self._state = {}
+        # (次に出す時刻, 単語)（答えるたびに追加し、古くなったものは取り出すときに捨てる）
+        self._heap = []
+        # まだ答えていない単語のうち、単語帳で一番前の番号
+        self._next_new = 0
+        # _next_new より後ろで、もう答えた単語の番号
+        # （まとめて出題して途中でやめると、答えなかった単語が前に残るので、答えた分を飛ばして出し直す）
+        self._answered_new = set()
+        # 出題したがまだ答えていない新しい単語 → 単語帳の番号
+        self._offered = {}
+        self._lines = 0
+        self._writer = writer or BackgroundWriter()
+
+    # 記録を読み込んで状態を復元する（同じ単語は後の行が有効）
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 書き込み途中で終了した最後の行などは読み飛ばす
+                        continue
+                    self._state[record["word"]] = [record["index"], record["box"], record["due"]]
+                    self._lines += 1
+        except FileNotFoundError:
+            pass
+        self._answered_new = {index for index, box, due in self._state.values()}
+        self._advance_new()
+        self._heap = [(due, word) for word, (index, box, due) in self._state.items()]
+        heapq.heapify(self._heap)
+        if self._lines > COMPACT_RATIO * len(self._state):
+            self.compact()
+        return self
+
+    # 次に出す (単語, 意味)（単語が無ければ None）
+    # 時刻が来た単語 → まだ出していない単語 → 次に時刻が来る単語 の順に選ぶ
+    def next_card(self, now=None):
+        if now is None:
+            now = time.time()
+        while True:
+            self._drop_stale()
+            if self._heap and self._heap[0][0] <= now:
+                word = self._heap[0][1]
+            elif self._next_new < len(self.deck):
+                word, meaning = self.deck.entry(self._next_new)
+                self._offered[word] = self._next_new
+                return word, meaning
+            elif self._heap:
+                word = self._heap[0][1]
+            else:
+                return None
+            meaning = self._meaning(word)
+            if meaning is not None:
+                return word, meaning
+            # 単語帳から無くなった単語は出題しない
+            del self._state[word]
+
+    # まとめて出題する count 問（同じ単語は1回だけ、出す順はシャッフル）
+    # 選ぶ順番は next_card と同じで、まだ出していない単語はまとめて1回で読む
+    def next_cards(self, count, now=None):
+        if now is None:
+            now = time.time()
+        cards = []
+        popped = []
+        # 時刻が来た単語をヒープから取り出す（あとで戻す）
+        while len(cards) < count:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            popped.append(self._pop_card(cards))
+        # まだ答えていない単語を単語帳の先頭から（もう答えた番号は飛ばす）
+        start = self._next_new
+        while len(cards) < count and start < len(self.deck):
+            entries = self.deck.entries(start, start + count - len(cards))
+            for index, (word, meaning) in enumerate(entries, start):
+                if index not in self._answered_new:
+                    self._offered[word] = index
+                    cards.append((word, meaning))
+            if not entries:
+                break
+            start += len(entries)
+        # 足りなければ次に時刻が来る単語から
+        while len(cards) < count:
+            self._drop_stale()
+            if not self._heap:
+                break
+            popped.append(self._pop_card(cards))
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        random.shuffle(cards)
+        return cards
+
+    # 答えの結果で次に出す時刻を決め直し、記録に追記する
+    def answer(self, word, correct, now=None):
+        self.answer_all([(word, correct)], now)
+
+    # まとめて出題した結果 [(単語, 正解したか), ...] を反映し、記録には1回で追記する
+    def answer_all(self, results, now=None):
+        if now is None:
+            now = time.time()
+        lines = []
+        for word, correct in results:
+            state = self._state.get(word)
+            if state is None:
+                # 初めて出した単語（next_card(s) で単語帳の先頭から選んだもの）
+                index = self._offered.pop(word, self._next_new)
+                self._answered_new.add(index)
+                self._advance_new()
+                state = self._state[word] = [index, 0, None]
+            box = min(state[1] + 1, len(BOX_INTERVALS) - 1) if correct else 0
+            due = now + BOX_INTERVALS[box]
+            state[1] = box
+            # 時刻が変わらなければヒープの項目はそのまま使える（同じ単語の項目を重ねない）
+            if state[2] != due:
+                state[2] = due
+                heapq.heappush(self._heap, (due, word))
+            lines.append(_encode(word, state))
+        if not lines:
+            return
+        self._writer.append_text(self.path, "".join(lines))
+        self._lines += len(lines)
+        # 古くなったヒープの項目が増えすぎたら作り直す
+        if len(self._heap) > COMPACT_RATIO * len(self._state):
+            self._heap = [(due, word) for word, (index, box, due) in self._state.items()]
+            heapq.heapify(self._heap)
+
+    # 記録を最新の状態だけに書き直す（書き込みは別スレッド）
+    def compact(self):
+        text = "".join(_encode(word, state) for word, state in self._state.items())
+        self._lines = len(self._state)
+        self._writer.submit(lambda: _replace_text(self.path, text), key=("compact", self.path))
+
+    def close(self):
+        self._writer.flush()
+
+    # 答えた単語が先頭から続いている分だけ _next_new を進める
+    def _advance_new(self):
+        while self._next_new in self._answered_new:
+            self._answered_new.discard(self._next_new)
+            self._next_new += 1
+
+    # 答えたあとの項目など、状態と一致しないヒープの先頭を捨てる
+    def _drop_stale(self):
+        while self._heap:
+            due, word = self._heap[0]
+            state = self._state.get(word)
+            if state is not None and state[2] == due:
+                return
+            heapq.heappop(self._heap)
+
+    # ヒープの先頭の単語を取り出し、意味が読めれば cards に加える（取り出した項目を返す）
+    def _pop_card(self, cards):
+        entry = heapq.heappop(self._heap)
+        word = entry[1]
+        meaning = self._meaning(word)
+        if meaning is None:
+            del self._state[word]
+        else:
+            cards.append((word, meaning))
+        return entry
+
+    # 覚えている番号から意味を読む（番号がずれていれば単語で引き直す）
+    def _meaning(self, word):
+        state = self._state[word]
+        if state[0] < len(self.deck):
+            entry_word, meaning = self.deck.entry(state[0])
+            if entry_word == word:
+                return meaning
+        return self.deck.get(word)
+
+
+def _encode(word, state):
+    return json.dumps({"word": word, "index": state[0], "box": state[1], "due": state[2]}, ensure_ascii=False) + "\n"
+
+
+def _replace_text(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
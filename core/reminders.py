@@ -0,0 +1,114 @@
+import heapq
+import itertools
+
+# 締め切りの何分前に知らせるか（0 は締め切りの時刻ちょうど）
+LEAD_MINUTES = (24 * 60, 60, 0)
+
+# ヒープの要素数が有効な予定の数のこの倍を超えたら、古くなったものを捨てて作り直す
+COMPACT_RATIO = 2
+
+
+# 締め切りの通知の予定（時刻はすべて Task.due と同じ分の通し番号）
+# (知らせる時刻, タスクID, 何分前か, 番号) のヒープで、一番早いものだけを見る
+# タスクが変わったら新しい番号で入れ直し、番号が古くなった要素は取り出すときに捨てる（ヒープの中は探さない）
+# 繰り返すタスクは次の回の分だけを入れ、その回の最後の通知を取り出したときに次の回を入れる
+class Reminders:
+    def __init__(self, lead_minutes=LEAD_MINUTES):
+        self.lead_minutes = tuple(sorted(set(lead_minutes), reverse=True))
+        self._heap = []
+        # タスクID → そのタスクの有効な要素の番号（完了・削除したタスクは持たない）
+        self._serial = {}
+        # 繰り返すタスクのID → タスク（次の回を入れるときに使う）
+        self._repeating = {}
+        self._counter = itertools.count()
+
+    # tasks の予定を作り直す（未完了で、知らせる時刻が now 以降のものだけ）
+    def load(self, tasks, now):
+        self._heap = []
+        self._serial = {}
+        self._repeating = {}
+        for task in tasks:
+            if not task.completed:
+                self._add(task, now, self._heap.append)
+        heapq.heapify(self._heap)
+
+    # task の予定を入れ直す（締め切りや完了が変わったときに呼ぶ）
+    def update(self, task, now):
+        self._serial.pop(task.id, None)
+        self._repeating.pop(task.id, None)
+        if not task.completed:
+            self._add(task, now, lambda entry: heapq.heappush(self._heap, entry))
+        self._compact_if_needed()
+
+    def remove(self, task_id):
+        self._serial.pop(task_id, None)
+        self._repeating.pop(task_id, None)
+        self._compact_if_needed()
+
+    # 次に知らせる時刻（予定が無ければ None）
+    def next_time(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    # now までに知らせる時刻になった予定を取り出し、(タスクID, 締め切り, 何分前か) の一覧で返す
+    # 締め切りはその回の分の通し番号（繰り返すタスクは Task.due と違う）
+    # 同じタスクの予定がいくつも溜まっていたとき（スリープから戻ったときなど）は締め切りに近いほうだけを返す
+    def pop_due(self, now):
+        due = {}
+        while self._heap and self._heap[0][0] <= now:
+            fire, task_id, lead, serial = heapq.heappop(self._heap)
+            if self._serial.get(task_id) == serial:
+                # 繰り返すタスクは次の回の通知が同じ時刻に並ぶことがあるので、小さいほうを残す
+                if task_id not in due or lead <= due[task_id][1]:
+                    due[task_id] = (fire + lead, lead)
+                if lead == self.lead_minutes[-1] and task_id in self._repeating:
+                    # その回の最後の通知なので次の回を入れる（もう時刻になっていればこのまま取り出す）
+                    self._push(self._repeating[task_id], fire + lead + 1, fire, serial, self._heap_push)
+        return [(task_id, deadline, lead) for task_id, (deadline, lead) in due.items()]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _add(self, task, now, push):
+        serial = next(self._counter)
+        self._serial[task.id] = serial
+        if task.repeat is None:
+            self._push_due(task.id, task.due, now, serial, push)
+            return
+        self._repeating[task.id] = task
+        # まだ最後の通知の時刻が過ぎていない回から
+        self._push(task, now + self.lead_minutes[-1], now, serial, push)
+
+    # 繰り返すタスクの、締め切りが after 以降の最初の未完了の回の予定を入れる
+    def _push(self, task, after, now, serial, push):
+        occurrence = task.next_occurrence(after)
+        if occurrence is not None:
+            self._push_due(task.id, occurrence.due, now, serial, push)
+
+    def _push_due(self, task_id, due, now, serial, push):
+        for lead in self.lead_minutes:
+            fire = due - lead
+            if fire >= now:
+                push((fire, task_id, lead, serial))
+
+    def _heap_push(self, entry):
+        heapq.heappush(self._heap, entry)
+
+    def _drop_stale(self):
+        while self._heap and self._serial.get(self._heap[0][1]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def _compact_if_needed(self):
+        if len(self._heap) > COMPACT_RATIO * len(self._serial) * len(self.lead_minutes) + 64:
+            self._heap = [entry for entry in self._heap if self._serial.get(entry[1]) == entry[3]]
+            heapq.heapify(self._heap)
+
+
+# 何分前かを通知の文にする
+def describe_lead(minutes):
+    if minutes <= 0:
+        return "締め切りの時刻になりました"
+    days, rest = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(rest, 60)
+    text = (f"{days}日" if days else "") + (f"{hours}時間" if hours else "") + (f"{minutes}分" if minutes else "")
+    return f"締め切りの{text}前です"
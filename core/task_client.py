@@ -0,0 +1,204 @@
+import itertools
+import json
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from .task_model import Task, to_minutes
+from .task_server import SERVER_HOST, SERVER_PORT
+from .task_store import DeadlineIndex, _TaskTable
+
+# サーバーが起動して待ち受けを始めるまで待つ最長の秒数
+STARTUP_TIMEOUT = 5.0
+
+# 応答を待つ最長の秒数
+REQUEST_TIMEOUT = 10.0
+
+
+# サーバーが要求を受け付けなかったとき（KeyError・ValueError 以外）
+class TaskServerError(Exception):
+    pass
+
+
+# タスクサーバー（core.task_server）経由の保存先（TaskStore と同じ操作で使える）
+# 読み出しは手元の表から行い、変更はサーバーに送って反映されてから手元にも反映する
+# 他の画面での変更は受信スレッドが溜めておき、poll_changes() を呼んだスレッドで手元に反映する
+# サーバーが動いていなければ autostart で起動する（画面が無くなると終了するモードで）
+class RemoteTaskStore(_TaskTable):
+    def __init__(self, path, empty=list, use_sqlite=False, host=SERVER_HOST, port=SERVER_PORT, autostart=True):
+        super().__init__()
+        self.path = path
+        self.empty = empty
+        self.use_sqlite = use_sqlite
+        self.address = (host, port)
+        self.autostart = autostart
+        self.deadlines = DeadlineIndex()
+        self._socket = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._responses = queue.Queue()
+        self._events = queue.Queue()
+        # タスクID → 手元に反映した変更の通し番号（これより古い知らせは読み捨てる）
+        self._seen = {}
+        self._load_seq = 0
+
+    # サーバーにつないで全タスクを受け取る（タスクID→タスクを返す）
+    def load(self):
+        self._socket = self._connect()
+        threading.Thread(target=self._receive, args=(self._socket.makefile("rb"),), daemon=True).start()
+        # サーバーが開いているのと同じファイルかをサーバーに確かめてもらう（違えば ValueError）
+        try:
+            result = self._request({"op": "load", "path": os.path.abspath(self.path)})
+        except Exception:
+            self.close()
+            raise
+        for value in result["tasks"]:
+            self._index(Task.from_dict(value))
+        self._load_seq = result["seq"]
+        self.deadlines = DeadlineIndex(self.tasks.values())
+        return self.tasks
+
+    def add(self, task):
+        response = self._request({"op": "add", "task": task.to_dict()}, with_seq=True)
+        task.id = response["result"]
+        self._index(task)
+        self.deadlines.add(task)
+        self._seen[task.id] = response["seq"]
+        return task.id
+
+    # 変更は task.copy() に加えて渡す（サーバーが受け付けてから手元のタスクに写すので、
+    # 断られたり接続が切れたりしても手元のタスクは変わらない）
+    def update(self, task):
+        response = self._request({"op": "update", "task": task.to_dict()}, with_seq=True)
+        task = self._adopt(task)
+        self._reindex(task)
+        self.deadlines.remove(task)
+        self.deadlines.add(task)
+        self._seen[task.id] = response["seq"]
+
+    def remove(self, task_id):
+        response = self._request({"op": "remove", "task_id": task_id}, with_seq=True)
+        self.deadlines.remove(self._unindex(task_id))
+        self._seen[task_id] = response["seq"]
+
+    def by_deadline(self, include_completed=False):
+        return self._with_recurring(self.deadlines.ordered(include_completed))
+
+    def upcoming(self, until, include_completed=False, now=None):
+        limit = to_minutes(until)
+        return self._with_recurring(self.deadlines.until(limit, include_completed), limit, include_completed, now)
+
+    # 他の画面での変更を手元の表に反映し、変わったタスクIDの一覧を返す（画面のスレッドで呼ぶ）
+    def poll_changes(self):
+        changed = {}
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            task_id = event["task"]["id"] if event["event"] == "put" else event["task_id"]
+            if event["seq"] <= max(self._seen.get(task_id, 0), self._load_seq):
+                continue
+            self._seen[task_id] = event["seq"]
+            changed[task_id] = None
+            current = self.tasks.get(task_id)
+            if event["event"] == "put":
+                if current is None:
+                    task = Task.from_dict(event["task"])
+                    self._index(task)
+                    self.deadlines.add(task)
+                else:
+                    # 画面が持っているタスクのオブジェクトはそのまま使えるよう、中身だけ書き換える
+                    current.assign(Task.from_dict(event["task"]))
+                    self._reindex(current)
+                    self.deadlines.remove(current)
+                    self.deadlines.add(current)
+            elif current is not None:
+                self.deadlines.remove(self._unindex(task_id))
+        return list(changed)
+
+    # 保存はサーバーが行うので、つなぎを切るだけ
+    def close(self):
+        if self._socket is not None:
+            # 受信スレッドの makefile が開いたままでも切れるよう、先に shutdown する
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._socket.close()
+            self._socket = None
+
+    def _connect(self):
+        try:
+            return socket.create_connection(self.address)
+        except ConnectionRefusedError:
+            if not self.autostart:
+                raise
+        self._start_server()
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                return socket.create_connection(self.address)
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    # サーバーを別のプロセスで起動する（この画面を閉じても動き続け、画面が無くなると終了する）
+    def _start_server(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        command = [
+            sys.executable, "-m", "core.task_server", os.path.abspath(self.path),
+            "--host", self.address[0], "--port", str(self.address[1]), "--exit-when-idle",
+        ]
+        if self.empty is dict:
+            command.append("--dict")
+        if self.use_sqlite:
+            command.append("--sqlite")
+        if sys.platform == "win32":
+            options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+        else:
+            options = {"start_new_session": True}
+        subprocess.Popen(command, cwd=root, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **options)
+
+    # 要求を送って応答を待つ（応答は順番に返ってくるので、同時に送るのは1つだけにする）
+    def _request(self, message, with_seq=False):
+        with self._lock:
+            message["id"] = next(self._ids)
+            self._socket.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+            deadline = time.monotonic() + REQUEST_TIMEOUT
+            while True:
+                try:
+                    response = self._responses.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    raise TimeoutError("タスクサーバーから応答がありません") from None
+                # 前の要求が時間切れになったあとに届いた応答は読み捨てる
+                if response is None or response.get("id") == message["id"]:
+                    break
+        if response is None:
+            raise ConnectionError("タスクサーバーとの接続が切れました")
+        if "error" in response:
+            if response["error"] == "KeyError":
+                raise KeyError(response["message"])
+            if response["error"] == "ValueError":
+                raise ValueError(response["message"])
+            raise TaskServerError(f"{response['error']}: {response['message']}")
+        return response if with_seq else response["result"]
+
+    # 受信スレッド（応答は要求した側へ、他の画面の変更は poll_changes 用に溜める）
+    def _receive(self, file):
+        try:
+            for line in file:
+                message = json.loads(line)
+                if "event" in message:
+                    self._events.put(message)
+                else:
+                    self._responses.put(message)
+        except (OSError, ValueError):
+            pass
+        # 切れたことを待っている要求に知らせる
+        self._responses.put(None)
@@ -0,0 +1,270 @@
+import calendar
+from datetime import date, datetime
+
+# 締め切りの形式（日付だけの版と時刻付きの版がある）
+DATE_FORMAT = "%Y/%m/%d"
+DATETIME_FORMAT = "%Y/%m/%d %H:%M"
+
+MINUTES_PER_DAY = 24 * 60
+
+# 繰り返しの単位（日ごと・週ごと・月ごと）
+FREQUENCIES = ("daily", "weekly", "monthly")
+
+# 1つの繰り返しから1回の問い合わせで作る回数の上限（終わりの無い繰り返しを長い期間で問い合わせたときの歯止め）
+MAX_OCCURRENCES = 1000
+
+
+# datetime を Task.due と同じ「分」の通し番号にする
+def to_minutes(moment):
+    return moment.toordinal() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+# "yyyy/mm/dd" を日付の通し番号（date.toordinal）にする
+def parse_day(text):
+    return date(int(text[0:4]), int(text[5:7]), int(text[8:10])).toordinal()
+
+
+# 締め切りの文字列を (分の通し番号, 日付の通し番号) にする（日付だけなら0時0分）
+def parse_deadline(text):
+    try:
+        day = parse_day(text)
+        if len(text) == 10:
+            return day * MINUTES_PER_DAY, day
+        if len(text) == 16 and text[10] == " " and text[13] == ":":
+            return day * MINUTES_PER_DAY + int(text[11:13]) * 60 + int(text[14:16]), day
+    except ValueError:
+        pass
+    # 想定外の書き方は strptime で解釈する（解釈できなければ ValueError）
+    fmt = DATE_FORMAT if len(text) <= 10 else DATETIME_FORMAT
+    moment = datetime.strptime(text, fmt)
+    return to_minutes(moment), moment.toordinal()
+
+
+# 分の通し番号を締め切りの文字列にする（with_time が偽なら日付だけ）
+def format_minutes(minutes, with_time=True):
+    day, minute = divmod(minutes, MINUTES_PER_DAY)
+    text = date.fromordinal(day).strftime(DATE_FORMAT)
+    if not with_time:
+        return text
+    return f"{text} {minute // 60:02}:{minute % 60:02}"
+
+
+# 繰り返しの規則（1回目は Task の締め切りで、そこから interval 日・週・か月ごと）
+# 終わりは until（この日付まで、yyyy/mm/dd）か count（回数）で、どちらも無ければずっと続く
+# done は完了にした最後の回の締め切り（分の通し番号）で、それまでの回は完了済みとして扱う
+# 各回は保存せず、問い合わせた期間の分だけ occurrences() で作る
+class Recurrence:
+    __slots__ = ("freq", "interval", "until", "count", "done", "_last_day")
+
+    def __init__(self, freq, interval=1, until=None, count=None, done=None):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"unknown frequency: {freq!r}")
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("interval and count must be positive")
+        if until is not None and len(until) != 10:
+            raise ValueError(f"until must be yyyy/mm/dd: {until!r}")
+        self.freq = freq
+        self.interval = interval
+        self.until = until
+        self.count = count
+        self.done = done
+        self._last_day = None if until is None else parse_day(until)
+
+    # 1回目の締め切りが start（分の通し番号）のとき、n 回目（0 始まり）の締め切り
+    def nth(self, start, n):
+        if self.freq != "monthly":
+            return start + n * self._step()
+        day, minute = divmod(start, MINUTES_PER_DAY)
+        first = date.fromordinal(day)
+        months = first.month - 1 + n * self.interval
+        year, month = first.year + months // 12, months % 12 + 1
+        # 31日など、その月に無い日は月末にする
+        day = min(first.day, calendar.monthrange(year, month)[1])
+        return date(year, month, day).toordinal() * MINUTES_PER_DAY + minute
+
+    # 締め切りが first〜last（分の通し番号）の回を順に返す（1回目から数えずに first の回まで飛ぶ）
+    def occurrences(self, start, first, last):
+        n = self._index_from(start, first)
+        for n in range(n, n + MAX_OCCURRENCES):
+            if self.count is not None and n >= self.count:
+                return
+            due = self.nth(start, n)
+            if due > last or (self._last_day is not None and due // MINUTES_PER_DAY > self._last_day):
+                return
+            yield due
+
+    def to_dict(self):
+        value = {"freq": self.freq, "interval": self.interval}
+        for name in ("until", "count", "done"):
+            if getattr(self, name) is not None:
+                value[name] = getattr(self, name)
+        return value
+
+    @classmethod
+    def from_dict(cls, value):
+        return cls(value["freq"], value.get("interval", 1), value.get("until"), value.get("count"), value.get("done"))
+
+    def _step(self):
+        return self.interval * (7 if self.freq == "weekly" else 1) * MINUTES_PER_DAY
+
+    # 締め切りが first 以降になる最初の回の番号（日・週は割り算、月は月の差から求める）
+    def _index_from(self, start, first):
+        if first <= start:
+            return 0
+        if self.freq != "monthly":
+            return -(-(first - start) // self._step())
+        a = date.fromordinal(start // MINUTES_PER_DAY)
+        b = date.fromordinal(first // MINUTES_PER_DAY)
+        n = max(((b.year - a.year) * 12 + b.month - a.month) // self.interval - 1, 0)
+        while self.nth(start, n) < first:
+            n += 1
+        return n
+
+    def __repr__(self):
+        return f"Recurrence({self.to_dict()!r})"
+
+
+# タスク1件
+# 締め切りは設定したときに1回だけ解析し、並べ替えや絞り込みでは due / day の整数を使う
+# id は保存先が振る番号で、名前が同じタスクも区別できる（振られる前は None）
+# repeat（Recurrence）があれば締め切りは1回目のもので、各回は occurrences() で期間の分だけ作る
+class Task:
+    __slots__ = ("id", "name", "completed", "_deadline", "due", "day", "repeat")
+
+    def __init__(self, name, completed, deadline, id=None, repeat=None):
+        self.id = id
+        self.name = name
+        self.completed = completed
+        self.deadline = deadline
+        self.repeat = repeat
+
+    @property
+    def deadline(self):
+        return self._deadline
+
+    @deadline.setter
+    def deadline(self, text):
+        self.due, self.day = parse_deadline(text)
+        self._deadline = text
+
+    # 締め切りが due（分の通し番号）の回の締め切りの文字列（繰り返さないタスクは deadline のまま）
+    # 元の締め切りに時刻が無ければ、繰り返しの各回も日付だけにする
+    def deadline_of(self, due):
+        if self.repeat is None:
+            return self.deadline
+        return format_minutes(due, len(self.deadline) > 10)
+
+    # 一覧の行やカレンダーのマークを見分けるキー（繰り返しの各回は (タスクID, 締め切り)）
+    @property
+    def key(self):
+        return self.id
+
+    # 締め切りが first〜last（分の通し番号）の回を締め切り順に（繰り返さないタスクはそのタスク自身）
+    # include_completed が偽なら、完了済みの回は飛ばす
+    def occurrences(self, first, last, include_completed=True):
+        if self.repeat is None:
+            if first <= self.due <= last and (include_completed or not self.completed):
+                yield self
+            return
+        if not include_completed:
+            if self.completed:
+                return
+            if self.repeat.done is not None:
+                first = max(first, self.repeat.done + 1)
+        for due in self.repeat.occurrences(self.due, first, last):
+            yield Occurrence(self, due)
+
+    # 締め切りが after（分の通し番号）以降で、まだ完了していない最初の回（無ければ None）
+    def next_occurrence(self, after=0):
+        return next(self.occurrences(after, float("inf"), include_completed=False), None)
+
+    # 完了にして、完了にした回を返す
+    # 繰り返すタスクはまだ完了していない最初の回だけを完了にし、最後の回だったらタスク全体を完了にする
+    def complete(self):
+        current = self.next_occurrence()
+        if self.repeat is None or current is None:
+            self.completed = True
+            return self
+        self.repeat.done = current.due
+        if self.next_occurrence() is None:
+            self.completed = True
+        return current
+
+    # 変更を加えるための写し（保存先が受け付けてから元のタスクに写せるように）
+    def copy(self):
+        return Task.from_dict(self.to_dict())
+
+    # other の中身（ID 以外）を写す（画面などが持っているオブジェクトをそのまま使い続けられるように）
+    def assign(self, other):
+        self.name = other.name
+        self.completed = other.completed
+        self._deadline, self.due, self.day = other._deadline, other.due, other.day
+        self.repeat = other.repeat
+
+    # 保存用の辞書（辞書形式のデータではキーがタスク名なので name を含めない）
+    # 繰り返すタスクだけ repeat を持つ（繰り返さないタスクは従来どおりの形）
+    def to_dict(self, with_name=True):
+        if with_name:
+            value = {"id": self.id, "name": self.name, "completed": self.completed, "deadline": self.deadline}
+        else:
+            value = {"id": self.id, "completed": self.completed, "deadline": self.deadline}
+        if self.repeat is not None:
+            value["repeat"] = self.repeat.to_dict()
+        return value
+
+    # id の無い古いデータは None のまま読み、保存先が番号を振る
+    @classmethod
+    def from_dict(cls, value, name=None):
+        repeat = value.get("repeat")
+        return cls(
+            value["name"] if name is None else name, value["completed"], value["deadline"], value.get("id"),
+            None if repeat is None else Recurrence.from_dict(repeat)
+        )
+
+    def __repr__(self):
+        return f"Task({self.name!r}, {self.completed!r}, {self.deadline!r}, id={self.id!r}, repeat={self.repeat!r})"
+
+
+# 繰り返すタスクの1回分（一覧やカレンダーに出すときだけ作り、保存はしない）
+# 名前などは元のタスクのもので、締め切りと完了状態がその回のもの
+class Occurrence:
+    __slots__ = ("task", "due", "day")
+
+    def __init__(self, task, due):
+        self.task = task
+        self.due = due
+        self.day = due // MINUTES_PER_DAY
+
+    @property
+    def id(self):
+        return self.task.id
+
+    @property
+    def name(self):
+        return self.task.name
+
+    @property
+    def repeat(self):
+        return self.task.repeat
+
+    @property
+    def key(self):
+        return (self.task.id, self.due)
+
+    @property
+    def completed(self):
+        done = self.task.repeat.done
+        return self.task.completed or (done is not None and self.due <= done)
+
+    @property
+    def deadline(self):
+        return self.task.deadline_of(self.due)
+
+    def to_dict(self, with_name=True):
+        value = self.task.to_dict(with_name)
+        value["completed"] = self.completed
+        value["deadline"] = self.deadline
+        return value
+
+    def __repr__(self):
+        return f"Occurrence({self.task!r}, {self.deadline!r})"
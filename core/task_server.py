@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+
+from .task_model import Task
+from .task_store import open_store
+
+# 待ち受けるアドレス（同じマシンの中からだけつなげる）
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 50765
+
+# --exit-when-idle のとき、つないでいる画面が無くなってから終了するまでの秒数
+IDLE_EXIT_SECONDS = 5.0
+
+
+# タスクの保存先を1つだけ開き、複数の画面（クライアント）からの変更を1件ずつ順番に反映するサーバー
+# やりとりは1行1つの JSON（要求 {"id", "op", ...} → 応答 {"id", "result"} か {"id", "error", "message"}）
+# 変更には通し番号を振り、変更した画面以外には {"event": "put" / "remove", "seq", ...} で知らせる
+# source は開いているファイルのパスで、load で画面が送ってきたパスと違えば断る
+# （読み書きするのはサーバーだけなので、画面の形式（dict / list）や SQLite の指定が違っても同じサーバーを使える）
+class TaskServer:
+    def __init__(self, store, on_idle=None, idle_seconds=IDLE_EXIT_SECONDS, source=None):
+        self.store = store
+        self.source = source
+        self.on_idle = on_idle
+        self.idle_seconds = idle_seconds
+        # つないでいる画面の StreamWriter
+        self.clients = set()
+        self._seq = 0
+        self._idle_timer = None
+
+    async def handle(self, reader, writer):
+        self.clients.add(writer)
+        self._cancel_idle()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                response, event = self.apply(request)
+                response["id"] = request.get("id")
+                _send(writer, response)
+                if event is not None:
+                    for client in self.clients:
+                        if client is not writer:
+                            _send(client, event)
+                await writer.drain()
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+            if not self.clients:
+                self._start_idle()
+
+    # 要求1件を反映して (応答, 他の画面への知らせ) を返す
+    def apply(self, request):
+        op = request.get("op")
+        try:
+            if op == "load":
+                self._check_source(request)
+                tasks = [task.to_dict() for task in self.store.tasks.values()]
+                return {"result": {"tasks": tasks, "seq": self._seq}}, None
+            if op == "add":
+                task = Task.from_dict(request["task"])
+                self.store.add(task)
+                return self._changed({"event": "put", "task": task.to_dict()}, task.id)
+            if op == "update":
+                value = request["task"]
+                task = self.store.get(value["id"])
+                if task is None:
+                    raise KeyError(value["id"])
+                task.assign(Task.from_dict(value))
+                self.store.update(task)
+                return self._changed({"event": "put", "task": task.to_dict()}, task.id)
+            if op == "remove":
+                self.store.remove(request["task_id"])
+                return self._changed({"event": "remove", "task_id": request["task_id"]}, None)
+            raise ValueError(f"unknown op: {op!r}")
+        except (KeyError, ValueError, TypeError) as error:
+            return {"error": type(error).__name__, "message": str(error)}, None
+
+    # 別のファイルを開いた画面が、気付かずにこのサーバーのファイルを読み書きしないようにする
+    def _check_source(self, request):
+        if self.source is None:
+            return
+        asked = request.get("path")
+        if _normalize(asked) != _normalize(self.source):
+            raise ValueError(f"this server has {self.source} open, not {asked}")
+
+    def _changed(self, event, result):
+        self._seq += 1
+        event["seq"] = self._seq
+        return {"result": result, "seq": self._seq}, event
+
+    def _start_idle(self):
+        if self.on_idle is not None and self._idle_timer is None:
+            self._idle_timer = asyncio.get_running_loop().call_later(self.idle_seconds, self.on_idle)
+
+    def _cancel_idle(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+
+def _normalize(path):
+    return None if path is None else os.path.normcase(os.path.abspath(path))
+
+
+def _send(writer, message):
+    writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+# path の保存先を開いてサーバーを動かす（止めるまで、exit_when_idle なら画面が無くなるまで）
+async def run_server(path, empty=list, use_sqlite=False, host=SERVER_HOST, port=SERVER_PORT, exit_when_idle=False):
+    stop = asyncio.Event()
+    store = open_store(path, empty, use_sqlite=use_sqlite)
+    server = TaskServer(store, on_idle=stop.set if exit_when_idle else None, source=os.path.abspath(path))
+    # 先に待ち受けを始める（同時に2つ起動されたら、後のほうはここで失敗して保存先を開かない）
+    listener = await asyncio.start_server(server.handle, host, port)
+    store.load()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows では Ctrl+C の KeyboardInterrupt で止まる
+    # 誰もつながないまま起動されたときも止まるようにする
+    server._start_idle()
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        for client in list(server.clients):
+            client.close()
+        store.close()
+
+
+# 例: python -m core.task_server tasks_with_calendar.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="タスクの保存先を複数の画面で共有するためのサーバー")
+    parser.add_argument("path", help="タスクデータのファイル")
+    parser.add_argument("--dict", action="store_true", help="新しく作るファイルを辞書形式にする")
+    parser.add_argument("--sqlite", action="store_true", help="SQLite（同名の .db）に保存する")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--exit-when-idle", action="store_true", help="つないでいる画面が無くなったら終了する")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_server(
+            args.path, dict if args.dict else list, args.sqlite, args.host, args.port, args.exit_when_idle
+        ))
+    except OSError as error:
+        # すでに別のサーバーが動いているとき
+        print(f"サーバーを起動できませんでした: {error}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,501 @@
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+from .background_writer import BackgroundWriter, atomic_write_json, load_json
+from .task_model import DATETIME_FORMAT, MINUTES_PER_DAY, Recurrence, Task, parse_day, to_minutes
+
+# ジャーナルの記録数がこれを超えたらバックグラウンドでスナップショットを作り直す
+COMPACT_THRESHOLD = 1000
+
+# スナップショットに埋め込むジャーナル番号のキー
+SEQ_KEY = "__journal_seq__"
+
+
+# 保存先を開く（use_sqlite なら同名の .db を使い、初回はJSONから取り込む）
+# use_server ならタスクサーバー経由にする（同じファイルを複数の画面で開いても変更が消えない）
+# writer を渡すと JSON の保存先はその書き込みスレッドを使う（他の保存とまとめて flush できる）
+def open_store(path, empty=list, use_sqlite=False, use_server=False, writer=None):
+    if use_server:
+        # task_client はこのモジュールを読み込むので、ここで読み込む
+        from .task_client import RemoteTaskStore
+        return RemoteTaskStore(path, empty, use_sqlite=use_sqlite)
+    if use_sqlite:
+        return SqliteTaskStore(os.path.splitext(path)[0] + ".db", empty, import_path=path)
+    return TaskStore(path, empty, writer=writer)
+
+
+# 締め切り順のタスクの並び（未完了と完了済みで別々に持つ）
+# 追加・削除は bisect で位置を探すだけで、全体の並べ替えはしない
+# 繰り返すタスクは入れない（_TaskTable が問い合わせた期間の分だけ展開する）
+class DeadlineIndex:
+    def __init__(self, tasks=()):
+        self._order = itertools.count()
+        self._entries = {False: [], True: []}
+        # タスクID → 登録したときの (完了状態, 並びのキー)
+        self._where = {}
+        for task in tasks:
+            if task.repeat is not None:
+                continue
+            entry = (task.due, next(self._order), task)
+            self._entries[task.completed].append(entry)
+            self._where[task.id] = (task.completed, entry[:2])
+        for entries in self._entries.values():
+            entries.sort(key=lambda entry: entry[:2])
+
+    def add(self, task):
+        if task.repeat is not None:
+            return
+        entry = (task.due, next(self._order), task)
+        insort(self._entries[task.completed], entry)
+        self._where[task.id] = (task.completed, entry[:2])
+
+    # 登録したときの状態で探して外す（外す前にタスクの中身が変わっていてもよい、登録していなければ何もしない）
+    def remove(self, task):
+        where = self._where.pop(task.id, None)
+        if where is None:
+            return
+        completed, key = where
+        entries = self._entries[completed]
+        del entries[bisect_left(entries, key)]
+
+    # 締め切りが limit（分の通し番号）以前のタスクを締め切り順に（該当する分だけ読む）
+    def until(self, limit, include_completed=False):
+        open_tasks = self._until(self._entries[False], limit)
+        if not include_completed:
+            return [entry[2] for entry in open_tasks]
+        return [entry[2] for entry in heapq.merge(open_tasks, self._until(self._entries[True], limit))]
+
+    def ordered(self, include_completed=False):
+        return self.until(float("inf"), include_completed)
+
+    def _until(self, entries, limit):
+        if limit == float("inf"):
+            return entries
+        return entries[:bisect_right(entries, (limit + 1,))]
+
+
+# タスクID・タスク名・締め切りの日付から引く表（どちらの保存先でも使う）
+class _TaskTable:
+    def __init__(self):
+        # タスクID → タスク（追加した順）
+        self.tasks = {}
+        # タスク名 → {タスクID: None}（同じ名前のタスクが複数あってもよい）
+        self._names = {}
+        # タスクID → 名前の表に登録したときの名前
+        self._name_of = {}
+        # 締め切りの日付（通し番号）→ {タスクID: None}
+        self._days = {}
+        # タスクID → 日付の表に登録したときの日付
+        self._day_of = {}
+        # 繰り返すタスクのID → タスク（日付の表には入れず、問い合わせた期間の分だけ回を作る）
+        self.recurring = {}
+        self._next_id = 1
+
+    # IDからタスクを取り出す（無ければ None）
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    # 名前が一致するタスクの一覧
+    def find(self, name):
+        return [self.tasks[task_id] for task_id in self._names.get(name, ())]
+
+    # 指定した日付（yyyy/mm/dd）が締め切りのタスクを時刻順に（完了済みも含む）
+    # その日の分だけを日付の表から取り出すので、全体の件数によらない（繰り返すタスクはその日の回）
+    def on_date(self, date):
+        day = parse_day(date)
+        tasks = [self.tasks[task_id] for task_id in self._days.get(day, ())]
+        tasks.extend(self._expand(day * MINUTES_PER_DAY, (day + 1) * MINUTES_PER_DAY - 1))
+        tasks.sort(key=lambda task: task.due)
+        return tasks
+
+    # 締め切りの日付の通し番号が first〜last のタスク（日付の表を1日ずつ引くので、その期間の分だけ）
+    def between(self, first, last):
+        tasks = []
+        for day in range(first, last + 1):
+            tasks.extend(self.tasks[task_id] for task_id in self._days.get(day, ()))
+        tasks.extend(self._expand(first * MINUTES_PER_DAY, (last + 1) * MINUTES_PER_DAY - 1))
+        return tasks
+
+    # 繰り返すタスクの、締め切りが first〜last（分の通し番号）の回
+    def _expand(self, first, last, include_completed=True):
+        return [
+            occurrence for task in self.recurring.values()
+            for occurrence in task.occurrences(first, last, include_completed)
+        ]
+
+    # 繰り返すタスクの、締め切りが limit までの回
+    # 期限切れの回はまだ完了していない最初の1回だけにし、あとは now〜limit の回だけを作る
+    # （繰り返しの始まりがどれだけ前でも、1つの繰り返しから作る回の数は期間の分だけ）
+    def _upcoming_occurrences(self, now, limit, include_completed):
+        occurrences = []
+        for task in self.recurring.values():
+            overdue = task.next_occurrence()
+            if overdue is not None and overdue.due < now and overdue.due <= limit:
+                occurrences.append(overdue)
+            occurrences.extend(task.occurrences(now, limit, include_completed))
+        return occurrences
+
+    # 締め切り順の tasks に繰り返すタスクの回を締め切り順に混ぜる（繰り返すタスクが無ければ tasks のまま）
+    # limit（分の通し番号）までの回を混ぜ、limit が無ければ（一覧全体）まだ完了していない次の回だけにする
+    def _with_recurring(self, tasks, limit=None, include_completed=False, now=None):
+        if not self.recurring:
+            return tasks
+        if limit is None:
+            extra = [task.next_occurrence() for task in self.recurring.values()]
+            extra = [occurrence for occurrence in extra if occurrence is not None]
+        else:
+            extra = self._upcoming_occurrences(to_minutes(now or datetime.now()), limit, include_completed)
+        extra.sort(key=lambda task: task.due)
+        return list(heapq.merge(tasks, extra, key=lambda task: task.due))
+
+    def _index(self, task):
+        if task.id is None:
+            task.id = self._next_id
+        self._next_id = max(self._next_id, task.id + 1)
+        self.tasks[task.id] = task
+        _link(self._names, self._name_of, task.name, task.id)
+        if task.repeat is None:
+            _link(self._days, self._day_of, task.day, task.id)
+        else:
+            self.recurring[task.id] = task
+
+    def _unindex(self, task_id):
+        _unlink(self._names, self._name_of, task_id)
+        if self.recurring.pop(task_id, None) is None:
+            _unlink(self._days, self._day_of, task_id)
+        return self.tasks.pop(task_id)
+
+    # 写しに加えた変更を表のタスクに写して、表のタスクを返す（無ければ KeyError）
+    def _adopt(self, task):
+        current = self.tasks[task.id]
+        if current is not task:
+            current.assign(task)
+        return current
+
+    # 書き換えたタスクの名前・日付の表を付け直す（並び順は変えない）
+    def _reindex(self, task):
+        if self._name_of[task.id] != task.name:
+            _unlink(self._names, self._name_of, task.id)
+            _link(self._names, self._name_of, task.name, task.id)
+        # 繰り返しを付けた・外したときは、日付の表と繰り返すタスクの表の間で移す
+        if task.repeat is not None:
+            if task.id in self._day_of:
+                _unlink(self._days, self._day_of, task.id)
+            self.recurring[task.id] = task
+            return
+        self.recurring.pop(task.id, None)
+        if self._day_of.get(task.id) != task.day:
+            if task.id in self._day_of:
+                _unlink(self._days, self._day_of, task.id)
+            _link(self._days, self._day_of, task.day, task.id)
+
+
+# buckets（キー → {タスクID: None}）に登録し、key_of に登録したキーを覚えておく
+def _link(buckets, key_of, key, task_id):
+    key_of[task_id] = key
+    buckets.setdefault(key, {})[task_id] = None
+
+
+def _unlink(buckets, key_of, task_id):
+    key = key_of.pop(task_id)
+    ids = buckets[key]
+    del ids[task_id]
+    if not ids:
+        del buckets[key]
+
+
+# タスクデータの保存先（スナップショット＋追記専用ジャーナル）
+# 変更は1件ずつジャーナルに追記し、ファイルへの書き込みはすべて BackgroundWriter が裏で行う
+# ファイルは従来どおり empty の形（list ならタスクの一覧、dict ならタスク名→内容）で保存する
+class TaskStore(_TaskTable):
+    def __init__(self, path, empty=list, compact_threshold=COMPACT_THRESHOLD, writer=None):
+        super().__init__()
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.old_journal_path = path + ".journal.old"
+        self.empty = empty
+        self.compact_threshold = compact_threshold
+        self.deadlines = DeadlineIndex()
+        self._seq = 0
+        self._pending = 0
+        self._writer = writer or BackgroundWriter()
+
+    # スナップショットを読み込み、ジャーナルを再生してデータを復元（タスクID→タスクを返す）
+    def load(self):
+        raw, snapshot_seq = self._read_snapshot()
+        self._seq = snapshot_seq
+        self._pending = 0
+        self._convert(raw)
+        # 圧縮途中で終了した場合は .old が残っているので先に再生する
+        for journal_path in (self.old_journal_path, self.journal_path):
+            for record in self._read_journal(journal_path):
+                if record["seq"] <= snapshot_seq:
+                    continue
+                try:
+                    self._replay(record)
+                except KeyError:
+                    # スナップショットと食い違う記録（壊れたファイルの退避後など）は読み飛ばす
+                    continue
+                self._seq = record["seq"]
+                self._pending += 1
+        self.deadlines = DeadlineIndex(self.tasks.values())
+        if self._pending >= self.compact_threshold:
+            self.compact()
+        return self.tasks
+
+    # タスクを追加して振ったIDを返す
+    def add(self, task):
+        task.id = None
+        self._index(task)
+        self.deadlines.add(task)
+        self._record({"op": "put", "value": task.to_dict()})
+        return task.id
+
+    # 中身を書き換えたタスクを反映する（task.copy() に変更を加えて渡せば、表のタスクに写す）
+    def update(self, task):
+        task = self._adopt(task)
+        self._reindex(task)
+        self.deadlines.remove(task)
+        self.deadlines.add(task)
+        self._record({"op": "put", "value": task.to_dict()})
+
+    # IDでタスクを削除する
+    def remove(self, task_id):
+        self.deadlines.remove(self._unindex(task_id))
+        self._record({"op": "remove", "id": task_id})
+
+    # 締め切り順のタスク一覧（繰り返すタスクはまだ完了していない次の回）
+    def by_deadline(self, include_completed=False):
+        return self._with_recurring(self.deadlines.ordered(include_completed))
+
+    # 締め切りが until（datetime）以前のタスクを締め切り順に（期限切れも含む）
+    # 繰り返すタスクは now（省くと今）から until までの回と、まだ完了していない期限切れの最初の1回
+    def upcoming(self, until, include_completed=False, now=None):
+        limit = to_minutes(until)
+        return self._with_recurring(self.deadlines.until(limit, include_completed), limit, include_completed, now)
+
+    # スナップショットを書き直してジャーナルを空にする（書き込みは別スレッド）
+    def compact(self, wait=False):
+        snapshot = {SEQ_KEY: self._seq, "data": self._copy_data()}
+        self._pending = 0
+        self._writer.submit(lambda: self._write_snapshot(snapshot), key=("compact", self.path))
+        if wait:
+            self._writer.flush()
+
+    # 終了時の処理（未反映のジャーナルがあれば圧縮し、書き込みが終わるまで待つ）
+    def close(self):
+        if self._pending:
+            self.compact()
+        self._writer.flush()
+
+    # 保存形式のデータからタスクを作り、IDの無いものには番号を振る
+    def _convert(self, raw):
+        if isinstance(raw, dict):
+            tasks = [Task.from_dict(value, key) for key, value in raw.items()]
+        else:
+            tasks = [Task.from_dict(value) for value in raw]
+        # 振った番号は次の圧縮で保存されるまで、同じ手順で同じ番号になる
+        self._next_id = max((task.id for task in tasks if task.id is not None), default=0) + 1
+        for task in tasks:
+            if task.id is None:
+                self._pending += 1
+            self._index(task)
+
+    def _replay(self, record):
+        if record["op"] == "put":
+            task = Task.from_dict(record["value"])
+            if task.id in self.tasks:
+                self.tasks[task.id] = task
+                self._reindex(task)
+            else:
+                self._index(task)
+        else:
+            self._unindex(record["id"])
+
+    # 辞書形式はキーがタスク名なので、値には name を含めない（従来のファイル形式のまま）
+    def _copy_data(self):
+        if self.empty is dict:
+            return {task.name: task.to_dict(with_name=False) for task in self.tasks.values()}
+        return [task.to_dict() for task in self.tasks.values()]
+
+    def _record(self, record):
+        self._seq += 1
+        record["seq"] = self._seq
+        self._writer.append_text(self.journal_path, json.dumps(record, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.compact_threshold:
+            self.compact()
+
+    def _read_snapshot(self):
+        snapshot = load_json(self.path, lambda: None)
+        if snapshot is None:
+            return self.empty(), 0
+        # 旧形式（データそのもの）のファイルもそのまま読めるようにする
+        if isinstance(snapshot, dict) and SEQ_KEY in snapshot:
+            return snapshot["data"], snapshot[SEQ_KEY]
+        return snapshot, 0
+
+    def _read_journal(self, journal_path):
+        try:
+            with open(journal_path, "r+b") as file:
+                good = 0
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        # 改行の無い最後の行は書き込み途中で落ちたもの
+                        # 次の追記がその行につながって読めなくならないよう、その行の前で切り詰める
+                        file.truncate(good)
+                        file.flush()
+                        os.fsync(file.fileno())
+                        return
+                    good += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 途中の壊れた行は読み飛ばす（後ろの記録は残す、ファイルも書き換えない）
+                        continue
+                    yield record
+        except FileNotFoundError:
+            return
+
+    # 書き込みスレッドで実行される（それまでの追記はすべて書き終わっている）
+    def _write_snapshot(self, snapshot):
+        # 後から来る追記が新しいジャーナルに入るよう、先にジャーナルを切り替える
+        # （前回の圧縮が途中で失敗して .old が残っている場合は上書きせず、番号で読み飛ばす）
+        if not os.path.exists(self.old_journal_path) and os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.old_journal_path)
+        atomic_write_json(self.path, snapshot)
+        # スナップショットに取り込み済みなので古いジャーナルは不要
+        if os.path.exists(self.old_journal_path):
+            os.remove(self.old_journal_path)
+
+
+# SQLiteに保存する版（TaskStore と同じ操作で使える）
+# タスクIDはテーブルの id 列で、締め切りの一覧は (completed, deadline) のインデックスを使った範囲検索になる
+class SqliteTaskStore(_TaskTable):
+    def __init__(self, path, empty=list, import_path=None):
+        super().__init__()
+        self.path = path
+        self.empty = empty
+        self.import_path = import_path
+        self._conn = None
+
+    # テーブルを用意してデータを読み込む（タスクID→タスクを返す）
+    def load(self):
+        if not os.path.exists(self.path):
+            self._create()
+        self._conn = _connect(self.path)
+        # 繰り返しを入れる前に作ったデータベースには repeat 列を足す
+        if "repeat" not in [row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")]:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN repeat TEXT")
+
+        for task_id, name, completed, deadline, repeat in self._conn.execute(
+            "SELECT id, name, completed, deadline, repeat FROM tasks ORDER BY id"
+        ):
+            repeat = None if repeat is None else Recurrence.from_dict(json.loads(repeat))
+            self._index(Task(name, bool(completed), deadline, task_id, repeat))
+        return self.tasks
+
+    def add(self, task):
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO tasks (name, completed, deadline, repeat) VALUES (?, ?, ?, ?)",
+                (task.name, task.completed, task.deadline, _repeat_json(task))
+            )
+        task.id = cursor.lastrowid
+        self._index(task)
+        return task.id
+
+    def update(self, task):
+        with self._conn:
+            self._conn.execute(
+                "UPDATE tasks SET name = ?, completed = ?, deadline = ?, repeat = ? WHERE id = ?",
+                (task.name, task.completed, task.deadline, _repeat_json(task), task.id)
+            )
+        self._reindex(self._adopt(task))
+
+    def remove(self, task_id):
+        with self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._unindex(task_id)
+
+    # 繰り返すタスクの行（repeat が NULL でない）はSQLでは探さず、メモリ上で回を作って混ぜる
+    def by_deadline(self, include_completed=False):
+        if include_completed:
+            return self._with_recurring(self._query("completed IN (0, 1) AND repeat IS NULL ORDER BY deadline"))
+        return self._with_recurring(self._query("completed = 0 AND repeat IS NULL ORDER BY deadline"))
+
+    def upcoming(self, until, include_completed=False, now=None):
+        completed = "completed IN (0, 1)" if include_completed else "completed = 0"
+        tasks = self._query(
+            completed + " AND repeat IS NULL AND deadline <= ? ORDER BY deadline", (until.strftime(DATETIME_FORMAT),)
+        )
+        return self._with_recurring(tasks, to_minutes(until), include_completed, now)
+
+    # 変更はその都度コミット済みなので閉じるだけ
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # 条件に合うIDだけをSQLで探し、タスクはメモリ上のものを返す
+    def _query(self, where, params=()):
+        return [self.tasks[task_id] for task_id, in self._conn.execute("SELECT id FROM tasks WHERE " + where, params)]
+
+    # 初回起動時のデータベースを作る
+    # 取り込みの途中で失敗しても空のデータベースが残らない（次の起動でまた取り込む）よう、別名で作ってから置き換える
+    def _create(self):
+        temp_path = self.path + ".tmp"
+        for path in (temp_path, temp_path + "-wal", temp_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+        conn = _connect(temp_path)
+        try:
+            if self.import_path:
+                self._import_json(conn)
+        finally:
+            conn.close()
+        os.replace(temp_path, self.path)
+
+    # 既存のJSON（ジャーナル込み）を取り込む（IDもそのまま引き継ぐ）
+    def _import_json(self, conn):
+        if not os.path.exists(self.import_path):
+            return
+        source = TaskStore(self.import_path, self.empty)
+        source.load()
+        with conn:
+            conn.executemany(
+                "INSERT INTO tasks (id, name, completed, deadline, repeat) VALUES (?, ?, ?, ?, ?)",
+                ((task.id, task.name, task.completed, task.deadline, _repeat_json(task)) for task in source.tasks.values())
+            )
+        source.close()
+
+
+# データベースを開いてテーブルを用意する
+# 終了時の close は作業スレッドから呼ぶことがある（読み書きはどれも1つずつ順番に行う）
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    # WALにして1件ごとのコミットでディスク同期を待たないようにする
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            deadline TEXT NOT NULL,
+            repeat TEXT
+        );
+        CREATE INDEX IF NOT EXISTS tasks_completed_deadline ON tasks (completed, deadline);
+        CREATE INDEX IF NOT EXISTS tasks_name ON tasks (name);
+    """)
+    return conn
+
+
+# repeat 列に入れる JSON（繰り返さないタスクは NULL）
+def _repeat_json(task):
+    return None if task.repeat is None else json.dumps(task.repeat.to_dict())
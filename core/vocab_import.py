@@ -0,0 +1,145 @@
+import csv
+import hashlib
+import itertools
+import os
+import sys
+
+from .vocab_store import open_deck
+
+# 結果に例として残す食い違いの件数（件数そのものはすべて数える）
+MAX_REPORTED_CONFLICTS = 100
+
+# 1行目がこれなら見出しとして読み飛ばす
+HEADER_NAMES = {("word", "meaning"), ("単語", "意味")}
+
+# 途中経過を知らせる間隔（行数）
+PROGRESS_ROWS = 10000
+
+
+# 取り込みの結果
+class ImportReport:
+    def __init__(self):
+        self.added = 0          # 新しく追加した単語の数
+        self.duplicates = 0     # 単語帳やファイル内にすでに同じ内容があった行の数
+        self.skipped = 0        # 列が足りない・単語が空の行の数
+        self.conflict_count = 0
+        # (単語, 単語帳の意味, ファイルの意味) の例（MAX_REPORTED_CONFLICTS 件まで）
+        self.conflicts = []
+
+    def add_conflict(self, word, current, new):
+        self.conflict_count += 1
+        if len(self.conflicts) < MAX_REPORTED_CONFLICTS:
+            self.conflicts.append((word, current, new))
+
+    def __str__(self):
+        lines = [f"追加: {self.added} 件, 重複: {self.duplicates} 件, 食い違い: {self.conflict_count} 件, 読み飛ばし: {self.skipped} 件"]
+        for word, current, new in self.conflicts:
+            lines.append(f"  {word}: 「{current}」 ⇔ 「{new}」")
+        if self.conflict_count > len(self.conflicts):
+            lines.append(f"  ほか {self.conflict_count - len(self.conflicts)} 件")
+        return "\n".join(lines)
+
+
+# CSV/TSV（1列目が単語、2列目が意味）を読み込んで単語帳に追加し、最後に1回だけ保存する
+# ファイルは2回先頭から読む（1回目で件数と重複を調べ、2回目で単語帳の書き直しに流し込む）ので、全体をメモリに載せない
+# 単語帳にある単語で意味が違うものは食い違いとして報告し、overwrite なら置き換える（ファイル内で重なった単語は最初の行を使う）
+# progress を渡すと、ときどき progress(段階, 済んだ量, 全体の量) を呼ぶ
+# （"read" はファイルを読んだバイト数、"write" は単語帳に書いた件数）
+def import_file(deck, path, delimiter=None, overwrite=False, progress=None):
+    if delimiter is None:
+        delimiter = "\t" if os.path.splitext(path)[1].lower() in (".tsv", ".tab") else ","
+    report = ImportReport()
+    existing = deck.word_index()
+    # 単語帳にある単語の番号 → ファイルの意味（最初の行）
+    hits = {}
+    # 新しい単語 → 意味のダイジェスト（ファイル内の重複を見分けるためだけに持つ。意味そのものは持たない）
+    new_words = {}
+
+    for word, meaning in _read_rows(path, delimiter, report, progress):
+        index = existing.get(word)
+        if index is not None:
+            if index not in hits:
+                hits[index] = meaning
+            elif hits[index] == meaning:
+                report.duplicates += 1
+            else:
+                report.add_conflict(word, hits[index], meaning)
+        elif word not in new_words:
+            new_words[word] = _digest(meaning)
+        elif new_words[word] == _digest(meaning):
+            report.duplicates += 1
+        else:
+            report.add_conflict(word, "（ファイル内の先の行）", meaning)
+    report.added = len(new_words)
+
+    count = len(deck) + report.added
+
+    def entries():
+        for index, (word, meaning) in enumerate(deck.items()):
+            if progress is not None and index % PROGRESS_ROWS == 0:
+                progress("write", index, count)
+            new = hits.get(index)
+            if new is not None:
+                if new == meaning:
+                    report.duplicates += 1
+                else:
+                    report.add_conflict(word, meaning, new)
+                    if overwrite:
+                        meaning = new
+            yield word, meaning
+        # 2回目は件数を数えず、まだ出していない新しい単語を最初の行の意味で流す
+        for word, meaning in _read_rows(path, delimiter, None):
+            if new_words.pop(word, None) is not None:
+                if progress is not None and len(new_words) % PROGRESS_ROWS == 0:
+                    progress("write", count - len(new_words), count)
+                yield word, meaning
+
+    if report.added or (overwrite and hits):
+        deck.replace_all(entries(), count)
+    else:
+        # 追加も置き換えも無ければ書き直さず、食い違いだけを調べる
+        for entry in entries():
+            pass
+    return report
+
+
+# 意味を見比べるためのダイジェスト（hash() と違い、意味が違うのに同じ値になることは事実上ない）
+def _digest(meaning):
+    return hashlib.blake2b(meaning.encode("utf-8"), digest_size=16).digest()
+
+
+def _read_rows(path, delimiter, report, progress=None):
+    with open(path, "r", encoding="utf-8-sig", newline="") as file:
+        size = os.fstat(file.fileno()).st_size
+        rows = csv.reader(file, delimiter=delimiter)
+        first = next(rows, None)
+        if first is not None and tuple(cell.strip().lower() for cell in first[:2]) not in HEADER_NAMES:
+            rows = itertools.chain([first], rows)
+        if progress is not None:
+            rows = _with_progress(rows, file.buffer, size, progress)
+        for row in rows:
+            if len(row) >= 2:
+                word = row[0].strip()
+                if word:
+                    yield word, row[1].strip()
+                    continue
+            if report is not None and any(row):
+                report.skipped += 1
+
+
+
+# rows を流しながら、PROGRESS_ROWS 行ごとに読んだバイト数を知らせる
+# （テキストとして読んでいる途中は tell() が使えないので、下のバイナリの位置を使う）
+def _with_progress(rows, buffer, size, progress):
+    for i, row in enumerate(rows, 1):
+        if i % PROGRESS_ROWS == 0:
+            progress("read", buffer.tell(), size)
+        yield row
+    progress("read", size, size)
+
+
+# 例: python -m core.vocab_import words.csv [vocabulary.json]
+if __name__ == "__main__":
+    deck = open_deck(sys.argv[2] if len(sys.argv) > 2 else "vocabulary.json")
+    print(import_file(deck, sys.argv[1]))
+    deck.close()
@@ -0,0 +1,124 @@
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+
+# 検索結果として返す最大件数
+SEARCH_LIMIT = 50
+
+
+# 検索用に文字列をそろえる（全角・半角と大文字・小文字の違いを無視する）
+def normalize(text):
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+# 単語帳の検索用の索引
+# 単語の前方一致は (単語, 番号) を並べた配列の二分探索、部分一致は連続する2文字の転置索引で探す
+# 索引は build() か最初の検索で単語帳を1回読んで作り、以降は追加・変更した単語だけを反映する
+class SearchIndex:
+    def __init__(self, deck):
+        self.deck = deck
+        self._built = False
+        # 別スレッドで作っている間の検索・変更は、作り終わるまで待つ
+        self._lock = threading.Lock()
+        # 番号 → そろえた「単語\n意味」（部分一致の確認に使う）
+        self._texts = []
+        # (そろえた単語, 番号) を単語順に並べたもの
+        self._sorted = []
+        # 連続する2文字（日本語もそのまま文字単位）→ それを含む番号の一覧
+        self._postings = {}
+
+    # 単語帳の i 番目を word / meaning にしたことを反映する（索引を作る前なら何もしない）
+    def put(self, i, word, meaning):
+        with self._lock:
+            if self._built:
+                self._put(i, word, meaning)
+
+    # 索引を作る（起動時に別スレッドで呼んでおくと最初の検索を待たずに済む）
+    def build(self):
+        with self._lock:
+            self._build()
+
+    # 単語が query で始まるものと、単語か意味に query を含むものを (単語, 意味) で返す（前方一致が先）
+    def search(self, query, limit=SEARCH_LIMIT):
+        query = normalize(query)
+        if not query:
+            return []
+        with self._lock:
+            self._build()
+            found = self._prefix(query, limit)
+            if len(found) < limit:
+                seen = set(found)
+                for i in self._substring(query):
+                    if i not in seen:
+                        seen.add(i)
+                        found.append(i)
+                        if len(found) >= limit:
+                            break
+        return [self.deck.entry(i) for i in found]
+
+    def _put(self, i, word, meaning):
+        if i < len(self._texts):
+            old_word = self._texts[i].split("\n", 1)[0]
+            self._sorted.pop(bisect_left(self._sorted, (old_word, i)))
+        key, text = _entry_text(word, meaning)
+        if i < len(self._texts):
+            self._texts[i] = text
+        else:
+            self._texts.append(text)
+        insort(self._sorted, (key, i))
+        # 意味を書き換えたときは古い番号が残るが、確認で除かれるので重ねて追加するだけにする
+        self._add_postings(i, text)
+
+    def _prefix(self, query, limit):
+        found = []
+        position = bisect_left(self._sorted, (query,))
+        while position < len(self._sorted) and len(found) < limit:
+            key, i = self._sorted[position]
+            if not key.startswith(query):
+                break
+            found.append(i)
+            position += 1
+        return found
+
+    # 含まれる2文字のうち一番出現の少ないものの一覧だけを確認する
+    # 1文字のときは索引が使えないので先頭から順に確認する（見つかった分だけで止まる）
+    def _substring(self, query):
+        if len(query) == 1:
+            candidates = range(len(self._texts))
+        else:
+            candidates = min((self._postings.get(query[i:i + 2], ()) for i in range(len(query) - 1)), key=len)
+        texts = self._texts
+        for i in candidates:
+            if query in texts[i]:
+                yield i
+
+    def _build(self):
+        if self._built:
+            return
+        self._built = True
+        texts = self._texts
+        keys = self._sorted
+        for i, (word, meaning) in enumerate(self.deck.items()):
+            key, text = _entry_text(word, meaning)
+            texts.append(text)
+            keys.append((key, i))
+            self._add_postings(i, text)
+        keys.sort()
+
+    def _add_postings(self, i, text):
+        postings = self._postings
+        for gram in {text[j:j + 2] for j in range(len(text) - 1)}:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("I")
+            if not posting or posting[-1] != i:
+                posting.append(i)
+
+
+# (そろえた単語, そろえた「単語\n意味」)
+def _entry_text(word, meaning):
+    key = normalize(word)
+    return key, key + "\n" + normalize(meaning)
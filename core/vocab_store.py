@@ -0,0 +1,411 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Mapping
+from json.encoder import encode_basestring
+
+from .background_writer import load_json
+
+# 「"単語": "意味"」1件分（前の空白と後ろの , か } まで）
+ENTRY_RE = re.compile(rb'\s*"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"\s*[,}]', re.S)
+
+# 一覧を読むときに1回のファイル読み込みで取り出す件数
+READ_BATCH = 1000
+
+# バイナリ形式の拡張子と先頭の識別子
+BINARY_SUFFIX = ".vdk"
+BINARY_MAGIC = b"VDK1"
+
+# ヘッダー（識別子, 予備, 単語数, 文字列数）
+HEADER = struct.Struct("<4sIQQ")
+# 1件分（単語の文字列番号, 意味の文字列番号）
+ENTRY = struct.Struct("<II")
+# 文字列の開始位置と終了位置
+SPAN = struct.Struct("<QQ")
+
+
+def _decode(raw):
+    # エスケープが無ければそのままUTF-8として読める
+    if b"\\" not in raw:
+        return raw.decode("utf-8")
+    return json.loads(b'"' + raw + b'"')
+
+
+# json.dumps(ensure_ascii=False) と同じ書き方（文字列だけなので直接エンコーダーを使う）
+def _encode_entry(word, meaning):
+    return encode_basestring(word) + ": " + encode_basestring(meaning)
+
+
+# 拡張子に応じた単語帳を開く（.vdk ならバイナリ、それ以外はJSON）
+# バイナリがまだ無く import_path があれば、そのJSONを取り込んで作る
+def open_deck(path, import_path=None):
+    if not path.endswith(BINARY_SUFFIX):
+        return LazyDeck(path).open()
+    deck = BinaryDeck(path).open()
+    if not os.path.exists(path) and import_path and os.path.exists(import_path):
+        source = LazyDeck(import_path).open()
+        deck.replace_all(source.items(), len(source))
+    return deck
+
+
+# 単語帳を別の形式のファイルに書き出す（JSON⇔バイナリの変換）
+def convert_deck(source_path, dest_path):
+    source = open_deck(source_path)
+    dest = LazyDeck(dest_path) if not dest_path.endswith(BINARY_SUFFIX) else BinaryDeck(dest_path)
+    dest.replace_all(source.items(), len(source))
+    dest.close()
+    source.close()
+
+
+# 単語帳の共通部分
+# ファイルにある分は番号で1件ずつ読み、追加・変更した単語は保存するまでメモリ上に持つ
+class Deck(Mapping):
+    def __init__(self, path):
+        self.path = path
+        self._base_len = 0
+        self._changed = {}
+        self._new_words = []
+        self._word_index = None
+        # 保存でファイルが入れ替わる間は読まない
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._base_len + len(self._new_words)
+
+    # i 番目の (単語, 意味)
+    def entry(self, i):
+        with self._lock:
+            if i < 0:
+                i += self._base_len + len(self._new_words)
+            if i < self._base_len:
+                (word, meaning), = self._read_base(i, i + 1)
+                return word, self._changed.get(word, meaning)
+            word = self._new_words[i - self._base_len]
+            return word, self._changed[word]
+
+    # start〜stop-1 番目の (単語, 意味)（表示する範囲だけをまとめて読む）
+    def entries(self, start, stop):
+        with self._lock:
+            stop = min(stop, self._base_len + len(self._new_words))
+            base_stop = min(stop, self._base_len)
+            entries = []
+            if start < base_stop:
+                entries = [(word, self._changed.get(word, meaning)) for word, meaning in self._read_base(start, base_stop)]
+            for word in self._new_words[max(start, self._base_len) - self._base_len:max(stop, self._base_len) - self._base_len]:
+                entries.append((word, self._changed[word]))
+        return entries
+
+    def __getitem__(self, word):
+        if word in self._changed:
+            return self._changed[word]
+        index = self._words().get(word)
+        if index is None:
+            raise KeyError(word)
+        return self.entry(index)[1]
+
+    # 単語の番号（無ければ None）
+    def index_of(self, word):
+        words = self._words()
+        with self._lock:
+            index = words.get(word)
+            if index is None and word in self._changed:
+                index = self._base_len + self._new_words.index(word)
+        return index
+
+    # 単語 → 番号の表（保存前に追加した単語も含む。返した表は書き換えないこと）
+    def word_index(self):
+        words = self._words()
+        with self._lock:
+            if not self._new_words:
+                return words
+            words = dict(words)
+            for offset, word in enumerate(self._new_words):
+                words[word] = self._base_len + offset
+        return words
+
+    def __setitem__(self, word, meaning):
+        words = self._words()
+        with self._lock:
+            if word not in self._changed and word not in words:
+                self._new_words.append(word)
+            self._changed[word] = meaning
+
+    def __iter__(self):
+        for word, meaning in self.items():
+            yield word
+
+    # 先頭から順に (単語, 意味) を読み出す（全体をメモリに載せない）
+    def items(self):
+        for word, meaning in self._iter_base():
+            yield word, self._changed.get(word, meaning)
+        for word in list(self._new_words):
+            yield word, self._changed[word]
+
+    # 変更があればファイルを書き直す（書き込みスレッドからも呼べる）
+    def save(self):
+        with self._lock:
+            if not self._changed and os.path.exists(self.path):
+                return
+            changed = dict(self._changed)
+            new_words = list(self._new_words)
+            base_len = self._base_len
+        count = base_len + len(new_words)
+        tmp_path = self.path + ".tmp"
+        state = self._write(tmp_path, self._iter_saved(base_len, new_words, changed), count)
+        # ファイルの入れ替えと保存した分の片付けは、読む側から途中が見えないようにまとめて行う
+        with self._lock:
+            self._swap(tmp_path, state, count)
+            # 書き込み中に追加・変更されたものは次の保存まで残す
+            saved = set(new_words)
+            self._new_words = [word for word in self._new_words if word not in saved]
+            for word, meaning in changed.items():
+                if self._changed.get(word) == meaning:
+                    del self._changed[word]
+            # 保存しても前からある単語の番号は変わらないので、新しい単語の番号を足すだけでよい
+            if self._word_index is not None:
+                for offset, word in enumerate(new_words):
+                    self._word_index[word] = base_len + offset
+
+    # 中身を entries（count 件の (単語, 意味)）で置き換えて保存する
+    def replace_all(self, entries, count):
+        tmp_path = self.path + ".tmp"
+        state = self._write(tmp_path, entries, count)
+        with self._lock:
+            self._swap(tmp_path, state, count)
+            self._changed = {}
+            self._new_words = []
+            self._word_index = None
+
+    def close(self):
+        pass
+
+    # 書き終えた一時ファイルを本物と入れ替える（self._lock を持って呼ぶ）
+    def _swap(self, tmp_path, state, count):
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._install(state, count)
+
+    def _iter_saved(self, base_len, new_words, changed):
+        for i, (word, meaning) in enumerate(self._iter_base()):
+            if i >= base_len:
+                break
+            yield word, changed.get(word, meaning)
+        for word in new_words:
+            yield word, changed[word]
+
+    # ファイルにある分を READ_BATCH 件ずつ読む
+    # （途中で保存されても並び順は変わらないので、続きの番号から読み進められる）
+    def _iter_base(self):
+        i = 0
+        while True:
+            with self._lock:
+                if i >= self._base_len:
+                    return
+                batch = self._read_base(i, min(i + READ_BATCH, self._base_len))
+            yield from batch
+            i += len(batch)
+
+    # 単語→番号の表（単語で引くときだけ作る）
+    def _words(self):
+        if self._word_index is None:
+            self._word_index = {word: i for i, (word, meaning) in enumerate(self._iter_base())}
+        return self._word_index
+
+
+# vocabulary.json を必要な分だけ読む単語帳
+# 初回に各項目の位置（バイトオフセット）を調べて .idx に保存し、以降は位置から1件ずつ読む
+class LazyDeck(Deck):
+    def __init__(self, path):
+        super().__init__(path)
+        self.index_path = path + ".idx"
+        self._offsets = array("q")
+
+    # ファイルを開く（位置の一覧が最新ならそれを読むだけ）
+    def open(self):
+        if os.path.exists(self.path) and not self._read_index():
+            self._build_index()
+        return self
+
+    def _read_base(self, start, stop):
+        with open(self.path, "rb") as file:
+            base = self._offsets[start]
+            file.seek(base)
+            buffer = file.read(self._offsets[stop] - base)
+        entries = []
+        for i in range(start, stop):
+            match = ENTRY_RE.match(buffer, self._offsets[i] - base)
+            entries.append((_decode(match.group(1)), _decode(match.group(2))))
+        return entries
+
+    # json.dump(indent=4) と同じ形で書き、各項目の位置を記録する
+    def _write(self, tmp_path, entries, count):
+        offsets = array("q")
+        position = 1
+        with open(tmp_path, "wb") as out:
+            out.write(b"{")
+            for i, (word, meaning) in enumerate(entries):
+                chunk = ("\n    " + _encode_entry(word, meaning) + ("," if i < count - 1 else "\n}")).encode("utf-8")
+                offsets.append(position)
+                out.write(chunk)
+                position += len(chunk)
+            if count:
+                offsets.append(position)
+            else:
+                out.write(b"}")
+            out.flush()
+            os.fsync(out.fileno())
+        return offsets
+
+    def _install(self, offsets, count):
+        self._offsets = offsets
+        self._base_len = count
+        self._write_index()
+
+    def _build_index(self):
+        offsets = array("q")
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            try:
+                start = view.find(b"{") + 1
+                position = start
+                for match in ENTRY_RE.finditer(view, start):
+                    if match.start() != position:
+                        break
+                    offsets.append(position)
+                    position = match.end()
+                # 最後の項目が } で終わっていなければ、文字列以外の値などを含む形式
+                if offsets:
+                    complete = view[position - 1:position] == b"}"
+                else:
+                    complete = start > 0 and view[start:].strip() == b"}"
+            finally:
+                if size:
+                    view.close()
+        if not complete:
+            self._load_all()
+            return
+        if offsets:
+            offsets.append(position)
+        self._install(offsets, max(len(offsets) - 1, 0))
+
+    # 1件ずつ読めない形式のときは従来どおり全体を読み込み、次の保存で書き直す
+    def _load_all(self):
+        data = load_json(self.path, dict)
+        self._offsets = array("q")
+        self._base_len = 0
+        self._changed = dict(data)
+        self._new_words = list(data)
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "rb") as file:
+                header = array("q")
+                header.fromfile(file, 3)
+                if list(header[:2]) != self._file_stamp():
+                    return False
+                offsets = array("q")
+                offsets.fromfile(file, header[2])
+        except (FileNotFoundError, EOFError):
+            return False
+        self._offsets = offsets
+        self._base_len = max(len(offsets) - 1, 0)
+        return True
+
+    def _write_index(self):
+        header = array("q", self._file_stamp() + [len(self._offsets)])
+        try:
+            with open(self.index_path, "wb") as file:
+                header.tofile(file)
+                self._offsets.tofile(file)
+        except OSError:
+            # 位置の一覧は作り直せるので、書けなくても続ける
+            pass
+
+
+# バイナリ形式（.vdk）の単語帳
+# ヘッダー → 各単語の (単語, 意味) の文字列番号 → 文字列の位置 → 文字列本体（UTF-8）の順に並ぶ
+# 同じ文字列は1回だけ保存する。開くときはmmapしてヘッダーを読むだけで、i 番目は位置の計算で直接読める
+class BinaryDeck(Deck):
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = None
+        self._view = None
+        self._spans_start = 0
+        self._strings_start = 0
+
+    def open(self):
+        if os.path.exists(self.path):
+            self._map()
+        return self
+
+    def close(self):
+        if self._view is not None:
+            self._view.close()
+            self._file.close()
+            self._view = None
+            self._file = None
+
+    def _map(self):
+        self._file = open(self.path, "rb")
+        self._view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, count, string_count = HEADER.unpack_from(self._view, 0)
+        if magic != BINARY_MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} は単語帳のバイナリファイルではありません")
+        self._base_len = count
+        self._spans_start = HEADER.size + ENTRY.size * count
+        self._strings_start = self._spans_start + 8 * (string_count + 1)
+
+    def _string(self, number):
+        start, end = SPAN.unpack_from(self._view, self._spans_start + 8 * number)
+        return self._view[self._strings_start + start:self._strings_start + end].decode("utf-8")
+
+    def _read_base(self, start, stop):
+        entries = []
+        for i in range(start, stop):
+            word, meaning = ENTRY.unpack_from(self._view, HEADER.size + ENTRY.size * i)
+            entries.append((self._string(word), self._string(meaning)))
+        return entries
+
+    def _write(self, tmp_path, entries, count):
+        numbers = {}
+        ids = array("I")
+        ends = array("Q", [0])
+        strings = bytearray()
+        for pair in entries:
+            for text in pair:
+                number = numbers.get(text)
+                if number is None:
+                    number = numbers[text] = len(numbers)
+                    strings += text.encode("utf-8")
+                    ends.append(len(strings))
+                ids.append(number)
+        if sys.byteorder != "little":
+            ids.byteswap()
+            ends.byteswap()
+        with open(tmp_path, "wb") as out:
+            out.write(HEADER.pack(BINARY_MAGIC, 0, len(ids) // 2, len(numbers)))
+            ids.tofile(out)
+            ends.tofile(out)
+            out.write(strings)
+            out.flush()
+            os.fsync(out.fileno())
+
+    def _install(self, state, count):
+        self._map()
+
+
+# 形式の変換（例: python -m core.vocab_store vocabulary.json vocabulary.vdk）
+if __name__ == "__main__":
+    convert_deck(sys.argv[1], sys.argv[2])
@@ -0,0 +1 @@
+# tkinter の画面部品（core のデータを表示するためのもの）
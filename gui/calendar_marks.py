@@ -0,0 +1,57 @@
+from datetime import date
+
+
+# カレンダー（tkcalendar）に付けるタスクのマーク
+# 表示中の月（前後の月の日も見えるので、その分を含めた期間）のタスクだけにマークを付ける
+# タスクのキー（task.key、繰り返すタスクは回ごと）→ calevent のIDを覚えておき、変わったタスクのマークだけを作り直す
+class CalendarMarks:
+    def __init__(self, calendar, tag="task", color="red"):
+        self.calendar = calendar
+        self.tag = tag
+        # タスクのキー → (calevent のID, 日付の通し番号, 表示する文字列)
+        self._events = {}
+        # マークを付けている期間（日付の通し番号、まだ表示していなければ None）
+        self._first = None
+        self._last = None
+        calendar.tag_config(tag, foreground=color)
+
+    # year 年 month 月の表示に合わせる（between(first, last) はその期間のタスクを返す関数）
+    def show_month(self, year, month, between):
+        # 月の表には前の月の最後の週と次の月の初めの週も並ぶ（最大6週）
+        start = date(year, month, 1).toordinal()
+        first, last = start - 6, start + 6 * 7
+        if (first, last) == (self._first, self._last):
+            return
+        self._first, self._last = first, last
+        self.refresh(between)
+
+    # 表示中の期間のマークを between で取り直す（繰り返すタスクを変えた・消したときなど、回がいくつあるか分からないとき）
+    def refresh(self, between):
+        if self._first is None:
+            return
+        tasks = between(self._first, self._last)
+        shown = {task.key for task in tasks}
+        for key in [key for key in self._events if key not in shown]:
+            self.remove(key)
+        for task in tasks:
+            self.update(task)
+
+    # task のマークを最新にする（未完了で表示中の期間にあれば付け、それ以外は外す）
+    def update(self, task):
+        if task.completed or self._first is None or not self._first <= task.day <= self._last:
+            self.remove(task.key)
+            return
+        text = "● " + task.name
+        current = self._events.get(task.key)
+        if current is not None:
+            if current[1:] == (task.day, text):
+                return
+            self.calendar.calevent_remove(current[0])
+        event_id = self.calendar.calevent_create(date.fromordinal(task.day), text, self.tag)
+        self._events[task.key] = (event_id, task.day, text)
+
+    # キー（繰り返さないタスクはタスクID）のマークを外す（付いていなければ何もしない）
+    def remove(self, key):
+        current = self._events.pop(key, None)
+        if current is not None:
+            self.calendar.calevent_remove(current[0])
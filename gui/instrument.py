@@ -0,0 +1,217 @@
+import atexit
+import functools
+import json
+import sys
+import time
+import tkinter as tk
+
+# ハートビートの間隔（ミリ秒）
+HEARTBEAT_MS = 50
+
+# ハートビートがこれ以上遅れたらメインループが止まっていたとみなす（秒）
+STALL_THRESHOLD = 0.2
+
+# ヒストグラムの区切り（ミリ秒、最後の区切りより長いものは「それ以上」にまとめる）
+BUCKET_LIMITS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+# JSON に残す止まりの件数の上限（多すぎるときは長いものから残す）
+MAX_STALLS = 1000
+
+
+# 1つのコールバックの回数と処理時間
+class CallbackStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_LIMITS_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        ms = seconds * 1000
+        for i, limit in enumerate(BUCKET_LIMITS_MS):
+            if ms < limit:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "buckets": self.buckets,
+        }
+
+
+# ボタンの command・bind したイベント・after のコールバックの処理時間を測り、
+# after で回すハートビートの遅れからメインループの止まりを見つける
+# 測る時間は呼び出しの中で呼んだ関数の分も含む（watch した関数は別に数える）
+class Instrument:
+    def __init__(self, root, threshold=STALL_THRESHOLD, interval=HEARTBEAT_MS):
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval
+        # 名前 → CallbackStats
+        self.stats = {}
+        # (起きた時刻, 遅れた秒数, その間にいちばん長かったコールバック)
+        self.stalls = []
+        self._started = time.time()
+        self._expected = None
+        # 前のハートビートからいちばん長かったコールバック (秒数, 名前)
+        self._slowest = (0.0, None)
+        self._original_register = None
+        self._original_after = None
+        self._in_after = False
+
+    # func を測る関数で包む（name を省くと定義された場所から名前を付ける）
+    def wrap(self, func, name=None):
+        if getattr(func, "_instrumented", False):
+            return func
+        name = name or callback_name(func)
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        timed._instrumented = True
+        return timed
+
+    def record(self, name, seconds):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CallbackStats()
+        stats.add(seconds)
+        if seconds > self._slowest[0]:
+            self._slowest = (seconds, name)
+
+    # target の関数を測る関数に置き換える（target は globals() のような辞書か、store のようなオブジェクト）
+    # コールバックの中から呼ばれる update_task_list や保存処理の時間を別に見たいときに使う
+    def watch(self, target, *names):
+        for name in names:
+            if isinstance(target, dict):
+                target[name] = self.wrap(target[name], name)
+            else:
+                setattr(target, name, self.wrap(getattr(target, name), f"{type(target).__name__}.{name}"))
+
+    # これ以降に登録されるコールバックをすべて測り、ハートビートを始める
+    # 終了時に output（None なら標準エラーに表の形）へ結果を書く
+    # （tkinter はコールバックを Misc._register で Tcl のコマンドにするので、そこで包む）
+    def install(self, output=None):
+        instrument = self
+        self._original_register = original_register = tk.Misc._register
+        self._original_after = original_after = tk.Misc.after
+
+        def _register(widget, func, subst=None, needcleanup=1):
+            if not instrument._in_after:
+                func = instrument.wrap(func)
+            return original_register(widget, func, subst, needcleanup)
+
+        # after は渡された関数をその場で作った関数に包んでから登録するので、
+        # 渡された関数のほうを包み、_register では包まない（ハートビート自身は測らない）
+        def after(widget, ms, func=None, *args):
+            if func is None:
+                return original_after(widget, ms)
+            if func != instrument._beat:
+                func = instrument.wrap(func)
+            instrument._in_after = True
+            try:
+                return original_after(widget, ms, func, *args)
+            finally:
+                instrument._in_after = False
+
+        # register は _register の別名なので両方を置き換える
+        tk.Misc._register = tk.Misc.register = _register
+        tk.Misc.after = after
+        self._expected = time.perf_counter() + self.interval / 1000
+        self.root.after(self.interval, self._beat)
+        atexit.register(self._write_result, output)
+        return self
+
+    # 包むのをやめる（登録済みのコールバックは包まれたまま）
+    def uninstall(self):
+        if self._original_register is not None:
+            tk.Misc._register = tk.Misc.register = self._original_register
+            tk.Misc.after = self._original_after
+            self._original_register = self._original_after = None
+
+    def _write_result(self, output):
+        self.uninstall()
+        if output:
+            self.export_json(output)
+        else:
+            self.report()
+
+    def _beat(self):
+        now = time.perf_counter()
+        late = now - self._expected
+        if late > self.threshold:
+            self.stalls.append((time.time(), late, self._slowest[1]))
+        self._slowest = (0.0, None)
+        self._expected = now + self.interval / 1000
+        try:
+            self.root.after(self.interval, self._beat)
+        except tk.TclError:
+            pass  # ウィンドウを閉じたあと
+
+    def to_dict(self):
+        stalls = self.stalls
+        if len(stalls) > MAX_STALLS:
+            stalls = sorted(sorted(stalls, key=lambda stall: stall[1], reverse=True)[:MAX_STALLS])
+        return {
+            "started": self._started,
+            "seconds": time.time() - self._started,
+            "heartbeat_ms": self.interval,
+            "stall_threshold_ms": self.threshold * 1000,
+            "bucket_limits_ms": list(BUCKET_LIMITS_MS),
+            "callbacks": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "stall_count": len(self.stalls),
+            "stalls": [
+                {"time": at, "late_ms": late * 1000, "callback": name} for at, late, name in stalls
+            ],
+        }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+    # 合計時間の長い順の表とヒストグラム、止まりの一覧を file に書く
+    def report(self, file=None):
+        file = file or sys.stderr
+        labels = [f"<{limit}" for limit in BUCKET_LIMITS_MS] + [f">={BUCKET_LIMITS_MS[-1]}"]
+        print(f"--- コールバックの処理時間（ミリ秒、{time.time() - self._started:.0f} 秒間） ---", file=file)
+        print(f"{'回数':>7} {'合計':>10} {'平均':>8} {'最大':>8}  {' '.join(f'{label:>6}' for label in labels)}  名前", file=file)
+        ordered = sorted(self.stats.items(), key=lambda item: item[1].total, reverse=True)
+        for name, stats in ordered:
+            row = stats.to_dict()
+            counts = " ".join(f"{count:>6}" for count in stats.buckets)
+            print(
+                f"{row['count']:>7} {row['total_ms']:>10.1f} {row['mean_ms']:>8.2f} {row['max_ms']:>8.1f}  {counts}  {name}",
+                file=file,
+            )
+        print(f"--- メインループの止まり（{self.threshold * 1000:.0f} ミリ秒以上）: {len(self.stalls)} 回 ---", file=file)
+        for at, late, name in sorted(self.stalls, key=lambda stall: stall[1], reverse=True)[:10]:
+            clock = time.strftime("%H:%M:%S", time.localtime(at))
+            print(f"{clock} {late * 1000:>8.1f}  {name or '（コールバック以外）'}", file=file)
+
+
+# コールバックの表示名（モジュール.関数名、ラムダは行番号も付ける）
+def callback_name(func):
+    target = getattr(func, "__func__", func)
+    name = getattr(target, "__qualname__", None)
+    if name is None:
+        return repr(func)
+    module = getattr(target, "__module__", None)
+    if "<lambda>" in name:
+        code = getattr(target, "__code__", None)
+        if code is not None:
+            name = f"{name}:{code.co_firstlineno}"
+    return f"{module}.{name}" if module else name
+
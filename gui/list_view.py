@@ -0,0 +1,111 @@
+import tkinter as tk
+from difflib import SequenceMatcher
+
+
+# Listbox に表示中の行を覚えておき、変わった行だけを書き換える
+# 行は (キー, 表示する文字列) で、キーはタスクIDなど行を見分けられる値
+class ListboxView:
+    def __init__(self, listbox):
+        self.listbox = listbox
+        # 表示中の行のキーと文字列（Listbox の行番号と同じ並び）
+        self.keys = []
+        self.texts = []
+
+    # 行番号 → キー
+    def key_at(self, index):
+        return self.keys[index]
+
+    # 表示を rows の並びにする（増えた行の挿入、消えた行の削除、文字列が変わった行の書き換えだけを行う）
+    def update(self, rows):
+        keys = [key for key, text in rows]
+        texts = [text for key, text in rows]
+
+        # 先頭と末尾で一致している行は比べるだけで済ませる
+        start = 0
+        old_end, new_end = len(self.keys), len(keys)
+        while start < old_end and start < new_end and self.keys[start] == keys[start]:
+            start += 1
+        while old_end > start and new_end > start and self.keys[old_end - 1] == keys[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        # 残った部分だけ差分を取り、後ろから反映する（前の行番号がずれない）
+        matcher = SequenceMatcher(None, self.keys[start:old_end], keys[start:new_end], autojunk=False)
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag == "equal":
+                continue
+            if i1 < i2:
+                self.listbox.delete(start + i1, start + i2 - 1)
+            if j1 < j2:
+                self.listbox.insert(start + i1, *texts[start + j1:start + j2])
+            self.texts[start + i1:start + i2] = texts[start + j1:start + j2]
+
+        # キーは同じで文字列だけ変わった行を置き換える
+        for i, text in enumerate(texts):
+            if self.texts[i] != text:
+                self.listbox.delete(i)
+                self.listbox.insert(i, text)
+
+        self.keys = keys
+        self.texts = texts
+
+
+# 大量の行を表示するリスト（見えている height 行だけを Listbox に入れる）
+# fetch(start, stop) で start〜stop-1 行目の文字列を取り出し、スクロールは行番号で行う
+class VirtualListView(tk.Frame):
+    def __init__(self, master, count, fetch, height=20, **kwargs):
+        super().__init__(master)
+        self.count = count
+        self.fetch = fetch
+        self.height = height
+        # 一番上に表示している行番号
+        self.top = 0
+        self.listbox = tk.Listbox(self, height=height, activestyle="none", **kwargs)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        # 表示中の行は行番号をキーにして差分で入れ替える（1行スクロールなら1行の削除と挿入）
+        self._view = ListboxView(self.listbox)
+        self.listbox.bind("<MouseWheel>", self._on_wheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(3))
+        self.listbox.bind("<Prior>", lambda event: self.scroll(-self.height))
+        self.listbox.bind("<Next>", lambda event: self.scroll(self.height))
+        self.render()
+
+    # 全体の行数が変わったときに呼ぶ
+    def set_count(self, count):
+        self.count = count
+        self.scroll_to(self.top, force=True)
+
+    # lines 行だけスクロールする（負なら上へ）
+    def scroll(self, lines):
+        self.scroll_to(self.top + lines)
+        return "break"
+
+    # top 行目が一番上に来るように表示する
+    def scroll_to(self, top, force=False):
+        top = max(0, min(top, self.count - self.height))
+        if top != self.top or force:
+            self.top = top
+            self.render()
+
+    # 見えている範囲の行だけを読み込んで表示する
+    def render(self):
+        stop = min(self.top + self.height, self.count)
+        self._view.update(list(zip(range(self.top, stop), self.fetch(self.top, stop))))
+        if self.count:
+            self.scrollbar.set(self.top / self.count, stop / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.count))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.height)
+        else:
+            self.scroll(int(amount))
+
+    def _on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
@@ -0,0 +1,28 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+# 別スレッドの処理が終わるまで出しておく進み具合の小窓
+# 出している間は他の画面を操作できない（grab_set）ので、処理中のデータに触られない
+class ProgressDialog(tk.Toplevel):
+    def __init__(self, master, title, text=""):
+        super().__init__(master)
+        self.title(title)
+        self.transient(master)
+        self.resizable(False, False)
+        self.label = tk.Label(self, text=text, width=40, anchor="w")
+        self.label.pack(padx=10, pady=(10, 5))
+        self.bar = ttk.Progressbar(self, length=300, maximum=1.0)
+        self.bar.pack(padx=10, pady=(0, 10))
+        # 途中で閉じられないようにする（処理は止められないので、終わったら close で閉じる）
+        self.protocol("WM_DELETE_WINDOW", lambda: None)
+        self.grab_set()
+
+    # text を表示し、バーを fraction（0〜1）まで進める
+    def set(self, text, fraction):
+        self.label.config(text=f"{text}（{fraction:.0%}）")
+        self.bar["value"] = fraction
+
+    def close(self):
+        self.grab_release()
+        self.destroy()
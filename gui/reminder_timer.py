@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from core.reminders import LEAD_MINUTES, Reminders
+from core.task_model import to_minutes
+
+# タイマーを一度に待たせる最長の時間（ミリ秒）
+# スリープから戻ったときや時計を合わせたときも、この間隔で次の時刻を確かめ直す
+MAX_WAIT_MS = 5 * 60 * 1000
+
+
+# 締め切りの通知を、次に知らせる時刻に掛けた root.after のタイマー1つで待つ
+# （待っている間は何もしないので、タスクの数にかかわらず暇なときの CPU はほぼ使わない）
+# 時刻になったら notify((タスクID, 締め切りの分の通し番号, 何分前か) の一覧) を呼ぶ
+class ReminderTimer:
+    def __init__(self, root, notify, lead_minutes=LEAD_MINUTES):
+        self.root = root
+        self.notify = notify
+        self.reminders = Reminders(lead_minutes)
+        self._after_id = None
+
+    # tasks の予定を作り直してタイマーを掛ける
+    def load(self, tasks):
+        self.reminders.load(tasks, to_minutes(datetime.now()))
+        self.arm()
+
+    # 追加・完了・締め切りの変更があったタスクの予定を入れ直す
+    def update(self, task):
+        self.reminders.update(task, to_minutes(datetime.now()))
+        self.arm()
+
+    # 削除したタスクの予定を外す
+    def remove(self, task_id):
+        self.reminders.remove(task_id)
+        self.arm()
+
+    # 次の時刻にタイマーを掛け直す（予定が無ければ止める）
+    def arm(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        fire = self.reminders.next_time()
+        if fire is None:
+            return
+        now = datetime.now()
+        wait_ms = (fire - to_minutes(now)) * 60 * 1000 - (now.second * 1000 + now.microsecond // 1000)
+        self._after_id = self.root.after(min(max(wait_ms, 0), MAX_WAIT_MS), self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        due = self.reminders.pop_due(to_minutes(datetime.now()))
+        # 知らせている間（メッセージボックスを出している間）も次の時刻を待てるよう、先に掛け直す
+        self.arm()
+        if due:
+            self.notify(due)
@@ -0,0 +1,51 @@
+from tkinter import messagebox, simpledialog
+
+from core.task_model import Recurrence
+
+# 入力する言葉 → 繰り返しの単位
+FREQUENCY_WORDS = {"毎日": "daily", "毎週": "weekly", "毎月": "monthly"}
+
+# 繰り返しの単位 → 間隔を付けて表示するときの単位
+FREQUENCY_UNITS = {"daily": "日", "weekly": "週", "monthly": "か月"}
+
+
+# タスクの繰り返しを尋ねて Recurrence を返す（空欄なら繰り返さないので None）
+# 終わりは回数（数字）か最後の日付（yyyy/mm/dd）で、空欄ならずっと続ける
+def ask_repeat(parent):
+    while True:
+        word = simpledialog.askstring(
+            "繰り返し", "繰り返す場合は 毎日 / 毎週 / 毎月 のどれかを入力してください（空欄なら繰り返さない）:", parent=parent
+        )
+        word = (word or "").strip()
+        if not word:
+            return None
+        if word in FREQUENCY_WORDS:
+            break
+        messagebox.showwarning("エラー", f"「{word}」は 毎日 / 毎週 / 毎月 のどれかで入力してください。", parent=parent)
+
+    while True:
+        end = simpledialog.askstring(
+            "繰り返しの終わり", "終わりを回数か日付（yyyy/mm/dd）で入力してください（空欄ならずっと続ける）:", parent=parent
+        )
+        end = (end or "").strip()
+        try:
+            if not end:
+                return Recurrence(FREQUENCY_WORDS[word])
+            if end.isdigit():
+                return Recurrence(FREQUENCY_WORDS[word], count=int(end))
+            return Recurrence(FREQUENCY_WORDS[word], until=end)
+        except ValueError:
+            messagebox.showwarning("エラー", f"「{end}」は回数か yyyy/mm/dd の日付で入力してください。", parent=parent)
+
+
+# 繰り返しを表示用の文字列にする（例: 毎週・10回、2日ごと・2026/03/31まで）
+def describe_repeat(repeat):
+    if repeat.interval == 1:
+        text = {"daily": "毎日", "weekly": "毎週", "monthly": "毎月"}[repeat.freq]
+    else:
+        text = f"{repeat.interval}{FREQUENCY_UNITS[repeat.freq]}ごと"
+    if repeat.count is not None:
+        text += f"・{repeat.count}回"
+    if repeat.until is not None:
+        text += f"・{repeat.until}まで"
+    return text
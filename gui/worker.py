@@ -0,0 +1,108 @@
+import queue
+import threading
+
+# 結果が届いていないか見に行く間隔（ミリ秒）
+POLL_MS = 50
+
+
+# 時間のかかる処理を1本の別スレッドで順番に行い、結果を Tk のスレッドで受け取る
+# 別スレッドからは Tk を触れないので、結果と途中経過はキューに入れ、root.after で取り出して呼ぶ
+# 処理は頼んだ順に1つずつ行う（ストアへの読み書きが重ならない）
+class Worker:
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = None
+        # 頼んだがまだ結果を受け取っていない処理の数
+        self._pending = 0
+        self._polling = False
+
+    # 結果を待っている処理があるか
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    # func(*args) を別スレッドで行い、終わったら Tk のスレッドで on_done(戻り値) を呼ぶ
+    # 例外が出たら on_error(例外) を呼ぶ（省略時は Tk のコールバックの例外と同じく表示する）
+    # on_progress を渡すと func には progress= も渡り、progress(...) の引数で on_progress を呼ぶ
+    # （途中経過は取り出すたびに最後のものだけを使う）
+    # always は成功しても失敗しても最後に引数なしで呼ぶ
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, always=None):
+        job = _Job(on_done, on_error, on_progress, always)
+        kwargs = {}
+        if on_progress is not None:
+            kwargs["progress"] = lambda *values: self._results.put((job, "progress", values))
+        self._pending += 1
+        self._jobs.put((job, func, args, kwargs))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return job
+
+    def _run(self):
+        while True:
+            job, func, args, kwargs = self._jobs.get()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as error:
+                self._results.put((job, "error", error))
+            else:
+                self._results.put((job, "done", result))
+
+    def _poll(self):
+        progress = {}
+        finished = []
+        while True:
+            try:
+                job, kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                progress[job] = value
+            else:
+                progress.pop(job, None)
+                finished.append((job, kind, value))
+        # 受け取る側の関数が例外を出しても、残りの結果は渡し続ける
+        for job, values in progress.items():
+            self._call(job.on_progress, *values)
+        for job, kind, value in finished:
+            self._pending -= 1
+            job.done = True
+            if kind == "done":
+                if job.on_done is not None:
+                    self._call(job.on_done, value)
+            elif job.on_error is not None:
+                self._call(job.on_error, value)
+            else:
+                self._report(value)
+            if job.always is not None:
+                self._call(job.always)
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception as error:
+            self._report(error)
+
+    def _report(self, error):
+        self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+
+# 頼まれた1つの処理（結果を受け取る関数をまとめて持つ）
+class _Job:
+    def __init__(self, on_done, on_error, on_progress, always):
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.always = always
+        self.done = False
+
@@ -1,12 +1,25 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, scrolledtext
-from datetime import datetime
+from datetime import datetime, timedelta
 from tkcalendar import Calendar
-import json
+from core.reminders import describe_lead
+from core.task_model import Task
+from core.task_store import open_store
+from gui.instrument import Instrument
+from gui.list_view import ListboxView
+from gui.reminder_timer import ReminderTimer
+from gui.repeat_dialog import ask_repeat, describe_repeat
+from gui.worker import Worker
 
 # タスクデータを保存するためのファイル名
 DATA_FILE = "tasks_with_calendar.json"
 
+# 締め切りまでの日数（切り捨て）がこれ以下なら「締め切りが近い」
+NEAR_DEADLINE_DAYS = 3
+
+# 締め切りの何分前に知らせるか（1日前・1時間前・締め切りの時刻）
+REMINDER_LEAD_MINUTES = (24 * 60, 60, 0)
+
 # カレンダーダイアログのクラス
 class CalendarDialog(simpledialog.Dialog):
     def __init__(self, master, title=None):
@@ -20,18 +33,26 @@ class CalendarDialog(simpledialog.Dialog):
     def apply(self):
         self.selected_date = self.calendar.get_date()
 
-# タスクデータの読み込み
-def load_data():
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+# True にするとSQLite（tasks_with_calendar.db）に保存する（初回はJSONから取り込む）
+USE_SQLITE = False
+
+# True にするとタスクサーバー（python -m core.task_server）経由で読み書きする
+# 同じファイルを複数の画面で開いても変更が消えない（サーバーは自動で起動し、画面が無くなると終了する）
+USE_SERVER = False
+# 他の画面での変更を取り込む間隔（ミリ秒、サーバー経由のときだけ）
+REMOTE_POLL_MS = 500
+
+# タスクデータの保存先（辞書形式、変更はジャーナルに追記）
+store = open_store(DATA_FILE, dict, use_sqlite=USE_SQLITE, use_server=USE_SERVER)
 
-# タスクデータの保存
-def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+# True にするとボタン・イベントの処理時間とメインループの止まりを測り、終了時に結果を出す
+INSTRUMENT = False
+# 測った結果を JSON で書くファイル（None なら終了時に標準エラーへ表の形で出す）
+INSTRUMENT_FILE = None
+
+# タスクデータの読み込み（スナップショット＋ジャーナルを再生）
+def load_data():
+    return store.load()
 
 # カレンダーから締め切りを選択
 def select_date():
@@ -46,24 +67,43 @@ def add_task():
 
     deadline = select_date()
     if deadline:
-        data[task] = {"completed": False, "deadline": deadline}
-        save_data(data)
-        messagebox.showinfo("成功", f"「{task}」が追加されました（締め切り: {deadline}）。")
-
-        # リストボックスにタスクを追加
-        root.task_list.insert(tk.END, f"{task} - 未完了（締め切り: {deadline}）")
+        # 同じ名前のタスクは置き換える（名前で保存する形式なので1つしか持てない）
+        replaced = store.find(task)
+        for old in replaced:
+            store.remove(old.id)
+        # 繰り返す場合も規則を1つ保存するだけで、各回は表示する期間の分だけ作る
+        repeat = ask_repeat(root)
+        task_id = store.add(Task(task, False, deadline, repeat=repeat))
+        repeat_text = f"、{describe_repeat(repeat)}" if repeat else ""
+        messagebox.showinfo("成功", f"「{task}」が追加されました（締め切り: {deadline}{repeat_text}）。")
+
+        # リストボックスを更新（増えた行だけ追加される）
+        update_task_list()
+        update_reminders([old.id for old in replaced] + [task_id])
 
 # タスクの完了状態を切り替え
 def toggle_task():
     task = simpledialog.askstring("タスク切り替え", "完了/未完了を切り替えるタスクを入力してください:")
-    if task in data:
-        data[task]["completed"] = not data[task]["completed"]
-        save_data(data)
-        status = "完了" if data[task]["completed"] else "未完了"
+    found = store.find(task)
+    if found:
+        info = found[0]
+        # 保存できなかったときに表示中のタスクが変わらないよう、写しを書き換えて渡す
+        changed = info.copy()
+        changed.completed = not changed.completed
+        try:
+            store.update(changed)
+        except (KeyError, ConnectionError, TimeoutError):
+            # 他の画面で削除された・サーバーとつながらないときは、今の状態を表示し直す
+            messagebox.showwarning("エラー", f"「{task}」を保存できませんでした。")
+            update_task_list()
+            update_reminders([info.id])
+            return
+        status = "完了" if info.completed else "未完了"
         messagebox.showinfo("成功", f"「{task}」が{status}になりました。")
 
         # リストボックスを更新
         update_task_list()
+        update_reminders([info.id])
 
     else:
         messagebox.showwarning("エラー", "そのタスクは存在しません。")
@@ -74,20 +114,14 @@ def delete_task():
     selected_indices = root.task_list.curselection()
     
     if selected_indices:
-        # 選択されたインデックスを逆順で処理
-        for index in selected_indices[::-1]:
-            # リストボックスからタスクを削除
-            task = root.task_list.get(index)  # インデックスを使ってタスク名を取得
-            root.task_list.delete(index)  # リストボックスから削除
-
-            # タスク名をデータから削除
-            del data[task.split(' - ')[0]]  # タスク名を取得してデータから削除
+        # 選択された行に対応するタスクIDでデータから削除
+        task_ids = [root.task_view.key_at(index) for index in selected_indices]
+        for task_id in task_ids:
+            store.remove(task_id)
 
-        # データをファイルに保存
-        save_data(data)
-
-        # リストボックスを更新
+        # リストボックスを更新（消えた行だけ削除される）
         update_task_list()
+        update_reminders(task_ids)
 
         # 成功メッセージを表示
         messagebox.showinfo("成功", "選択されたタスクが削除されました。")
@@ -97,50 +131,94 @@ def delete_task():
 
 # タスクのリストボックスを更新
 def update_task_list():
-    # リストボックスをクリア
-    root.task_list.delete(0, tk.END)
-    for task, info in data.items():
-        status = "完了" if info["completed"] else "未完了"
-        root.task_list.insert(tk.END, f"{task} - {status}（締め切り: {info['deadline']}）")
+    # 表示中の一覧との差分だけをリストボックスに反映する
+    rows = []
+    for info in data.values():
+        status = "完了" if info.completed else "未完了"
+        # 繰り返すタスクは1行だけ（締め切りは1回目）で、繰り返し方を添える
+        repeat_text = f"・{describe_repeat(info.repeat)}" if info.repeat else ""
+        rows.append((info.id, f"{info.name} - {status}（締め切り: {info.deadline}{repeat_text}）"))
+    root.task_view.update(rows)
+
+# 締め切りの通知の予定を更新（task_ids のタスクだけ入れ直し、タイマーを掛け直す）
+def update_reminders(task_ids):
+    for task_id in task_ids:
+        task = data.get(task_id)
+        if task is None:
+            reminder_timer.remove(task_id)  # 削除されたタスク
+        else:
+            reminder_timer.update(task)
+
+# 締め切りが近づいたタスクを知らせる（due は (タスクID, その回の締め切り, 何分前か) の一覧）
+def notify_deadlines(due):
+    lines = [
+        f"「{data[task_id].name}」（{data[task_id].deadline_of(deadline)}）: {describe_lead(lead)}"
+        for task_id, deadline, lead in due if task_id in data
+    ]
+    if lines:
+        root.bell()
+        messagebox.showwarning("締め切りのお知らせ", "\n".join(lines))
+
+# 他の画面での変更を反映する（サーバー経由のときだけ、届いた分を一定間隔で取り込む）
+def apply_remote_changes():
+    changed = store.poll_changes()
+    if changed:
+        update_task_list()
+        update_reminders(changed)
+    root.after(REMOTE_POLL_MS, apply_remote_changes)
 
 # 締め切りが近いタスクを表示
-def show_near_deadline():
+def show_near_deadline(days=NEAR_DEADLINE_DAYS):
     today = datetime.today()
     tasks_window = tk.Toplevel(root)
     tasks_window.title("締め切りが近いタスク")
     st = scrolledtext.ScrolledText(tasks_window, width=60, height=20)
     st.pack(padx=10, pady=10)
 
-    near_deadline = [
-        (task, info) for task, info in data.items()
-        if info["deadline"] and (datetime.strptime(info["deadline"], "%Y/%m/%d") - today).days <= 3
-    ]
+    # 残り日数（切り捨て）が days 以下 ＝ 締め切りが days+1 日後より前（完了済みも含む）
+    limit = today + timedelta(days=days + 1) - timedelta(minutes=1)
+    near_deadline = store.upcoming(limit, include_completed=True)
 
     if near_deadline:
-        for task, info in near_deadline:
-            status = "完了" if info["completed"] else "未完了"
-            st.insert(tk.END, f"{task} - {status}（締め切り: {info['deadline']}）\n")
+        for info in near_deadline:
+            status = "完了" if info.completed else "未完了"
+            st.insert(tk.END, f"{info.name} - {status}（締め切り: {info.deadline}）\n")
     else:
         st.insert(tk.END, "締め切りが近いタスクはありません。")
 
-# アプリ終了処理
+# アプリ終了処理（ジャーナルの反映が終わるまで画面を隠して待ち、終わったら閉じる）
 def on_closing():
-    save_data(data)#アプリが閉じられるときにデータ保存
-    root.destroy()
+    root.withdraw()
+    worker.submit(store.close, always=root.destroy)
 
 # メインウィンドウの設定
 root = tk.Tk()
 root.title("タスク管理アプリ")
 
+# ストアの閉じる処理などは作業スレッドで行い、結果はメインループで受け取る
+worker = Worker(root)
+
+# INSTRUMENT が True なら、これ以降に登録するコールバックの処理時間を測る
+instrument = Instrument(root).install(INSTRUMENT_FILE) if INSTRUMENT else None
+
 # データの読み込み
 data = load_data()
 
 # タスクの一覧を表示するリストボックス
 root.task_list = tk.Listbox(root, selectmode="multiple", bd=10)
 root.task_list.pack(fill="both", expand=True, padx=20, pady=(10, 0))  # ボタンの上に配置
+root.task_view = ListboxView(root.task_list)
 
 update_task_list()
 
+# 締め切りの通知（予定はヒープに持ち、次に知らせる時刻にだけタイマーを掛ける）
+reminder_timer = ReminderTimer(root, notify_deadlines, REMINDER_LEAD_MINUTES)
+root.after_idle(lambda: reminder_timer.load(data.values()))
+
+# サーバー経由なら他の画面での変更を取り込み続ける
+if USE_SERVER:
+    root.after(REMOTE_POLL_MS, apply_remote_changes)
+
 # ボタンの配置
 frame = tk.Frame(root)
 frame.pack(pady=10)
@@ -163,5 +241,10 @@ btn_exit.grid(row=5, column=0, pady=5)
 # ウィンドウを閉じるときの処理
 root.protocol("WM_DELETE_WINDOW", on_closing)
 
+# 処理時間を測るときは、コールバックの中で呼ぶ処理も別に数える
+if instrument:
+    instrument.watch(globals(), "update_task_list", "show_near_deadline")
+    instrument.watch(store, "add", "update", "remove", "find", "upcoming")
+
 # メインループの開始
 root.mainloop()
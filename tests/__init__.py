@@ -0,0 +1 @@
+# core の動作確認（python -m pytest tests）
@@ -0,0 +1,37 @@
+import json
+
+from core.background_writer import BackgroundWriter, load_json
+
+
+def test_saves_of_the_same_file_are_merged(tmp_path):
+    path = str(tmp_path / "data.json")
+    writer = BackgroundWriter(delay=10)
+    calls = []
+    for i in range(5):
+        writer.save_json(path, {"count": i})
+        writer.submit(lambda i=i: calls.append(i), key="job")
+    writer.flush()
+    with open(path, encoding="utf-8") as file:
+        assert json.load(file) == {"count": 4}
+    # 同じ key の処理は最後の1回だけ
+    assert calls == [4]
+
+
+def test_appends_are_written_in_order(tmp_path):
+    path = str(tmp_path / "journal")
+    writer = BackgroundWriter(delay=10)
+    for line in ("a\n", "b\n", "c\n"):
+        writer.append_text(path, line)
+    writer.flush()
+    writer.append_text(path, "d\n")
+    writer.flush()
+    with open(path, encoding="utf-8") as file:
+        assert file.read() == "a\nb\nc\nd\n"
+
+
+def test_corrupt_json_is_kept_aside(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("{broken", encoding="utf-8")
+    assert load_json(str(path), dict) == {}
+    assert (tmp_path / "data.json.corrupt").read_text(encoding="utf-8") == "{broken"
+    assert load_json(str(path), list) == []
@@ -0,0 +1,87 @@
+from core.task_model import Task
+from gui.calendar_marks import CalendarMarks
+
+
+# tkcalendar の Calendar の代わり（付いているマークを覚えておく）
+class _Calendar:
+    def __init__(self):
+        self.events = {}
+        self.created = 0
+        self._ids = iter(range(1, 1000))
+
+    def tag_config(self, tag, **options):
+        pass
+
+    def calevent_create(self, day, text, tag):
+        event_id = next(self._ids)
+        self.events[event_id] = (day.strftime("%Y/%m/%d"), text)
+        self.created += 1
+        return event_id
+
+    def calevent_remove(self, event_id):
+        del self.events[event_id]
+
+
+def _marks(tasks):
+    calendar = _Calendar()
+    marks = CalendarMarks(calendar)
+    marks.show_month(2026, 1, lambda first, last: [task for task in tasks if first <= task.day <= last])
+    return calendar, marks
+
+
+def test_only_changed_tasks_are_marked_again():
+    a = Task("a", False, "2026/01/10 09:00", id=1)
+    b = Task("b", False, "2026/01/20 09:00", id=2)
+    calendar, marks = _marks([a, b])
+    assert sorted(calendar.events.values()) == [("2026/01/10", "● a"), ("2026/01/20", "● b")]
+
+    calendar.created = 0
+    marks.update(a)
+    assert calendar.created == 0
+    b.name = "b2"
+    marks.update(b)
+    assert calendar.created == 1
+    assert sorted(calendar.events.values()) == [("2026/01/10", "● a"), ("2026/01/20", "● b2")]
+
+    # 完了したタスク・削除したタスクのマークは外す
+    a.completed = True
+    marks.update(a)
+    marks.remove(b.key)
+    marks.remove(b.key)
+    assert calendar.events == {}
+
+
+def test_only_the_shown_month_is_marked():
+    tasks = [
+        Task("december", False, "2025/12/30 09:00", id=1),
+        Task("january", False, "2026/01/15 09:00", id=2),
+        Task("march", False, "2026/03/15 09:00", id=3),
+    ]
+    asked = []
+
+    def between(first, last):
+        asked.append((first, last))
+        return [task for task in tasks if first <= task.day <= last]
+
+    calendar = _Calendar()
+    marks = CalendarMarks(calendar)
+    # 表示する前は何もしない
+    marks.update(tasks[1])
+    assert calendar.events == {}
+
+    marks.show_month(2026, 1, between)
+    marks.show_month(2026, 1, between)
+    assert len(asked) == 1
+    # 1月の表には前の月の最後の週も見える
+    assert sorted(text for day, text in calendar.events.values()) == ["● december", "● january"]
+
+    marks.show_month(2026, 3, between)
+    assert [text for day, text in calendar.events.values()] == ["● march"]
+    # 表示中の期間の外にあるタスクにはマークを付けない
+    marks.update(tasks[1])
+    assert [text for day, text in calendar.events.values()] == ["● march"]
+
+    # 取り直したときに無くなったタスクのマークは外す
+    del tasks[2]
+    marks.refresh(between)
+    assert calendar.events == {}
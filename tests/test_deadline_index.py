@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from core.task_model import Recurrence, Task, to_minutes
+from core.task_store import DeadlineIndex
+
+
+def _names(tasks):
+    return [task.name for task in tasks]
+
+
+def test_tasks_are_ordered_by_deadline():
+    tasks = [
+        Task("c", False, "2026/01/03 09:00", id=1),
+        Task("a", False, "2026/01/01 09:00", id=2),
+        Task("done", True, "2026/01/02 09:00", id=3),
+        Task("b", False, "2026/01/01 09:00", id=4),
+        Task("repeat", False, "2026/01/01 08:00", id=5, repeat=Recurrence("daily")),
+    ]
+    index = DeadlineIndex(tasks)
+    # 同じ締め切りは追加した順、繰り返すタスクは入れない
+    assert _names(index.ordered()) == ["a", "b", "c"]
+    assert _names(index.ordered(include_completed=True)) == ["a", "b", "done", "c"]
+    assert _names(index.until(to_minutes(datetime(2026, 1, 2, 9, 0)))) == ["a", "b"]
+    assert _names(index.until(to_minutes(datetime(2026, 1, 2, 9, 0)), include_completed=True)) == ["a", "b", "done"]
+
+
+def test_changed_task_is_moved():
+    index = DeadlineIndex()
+    a = Task("a", False, "2026/01/01 09:00", id=1)
+    b = Task("b", False, "2026/01/02 09:00", id=2)
+    index.add(a)
+    index.add(b)
+    # 中身を書き換えてから外しても、登録したときの位置から外れる
+    a.deadline = "2026/01/03 09:00"
+    a.completed = True
+    index.remove(a)
+    index.add(a)
+    assert _names(index.ordered()) == ["b"]
+    assert _names(index.ordered(include_completed=True)) == ["b", "a"]
+    index.remove(b)
+    index.remove(b)
+    assert _names(index.ordered(include_completed=True)) == ["a"]
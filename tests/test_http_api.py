@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+import time
+
+from core.background_writer import BackgroundWriter
+from core.http_api import TaskApi
+from core.quiz_scheduler import QuizScheduler
+from core.task_store import TaskStore
+from core.vocab_store import LazyDeck, open_deck
+
+
+# タスクサーバー経由の保存先の代わり（応答を待つ間ブロックする）
+class _SlowRemoteStore(TaskStore):
+    polls = 0
+
+    def poll_changes(self):
+        self.polls += 1
+        return []
+
+    def by_deadline(self, include_completed=False):
+        time.sleep(0.2)
+        return super().by_deadline(include_completed)
+
+
+# 大きな単語帳の代わり（先頭から読むのに時間がかかる）
+class _SlowDeck(LazyDeck):
+    def items(self):
+        time.sleep(0.3)
+        return super().items()
+
+
+def _api(tmp_path, store, deck_class=None):
+    path = tmp_path / "vocabulary.json"
+    path.write_text(json.dumps({"apple": "りんご"}), encoding="utf-8")
+    writer = BackgroundWriter()
+    deck = open_deck(str(path)) if deck_class is None else deck_class(str(path)).open()
+    return TaskApi(store, deck, QuizScheduler(deck, str(tmp_path / "schedule.jsonl"), writer).load(), writer)
+
+
+# イベントループが止まらずに回った回数を数えながら coroutine を動かす
+async def _count_ticks(coroutine):
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    result = await coroutine
+    ticker.cancel()
+    return result, ticks
+
+
+def test_remote_store_calls_do_not_block_the_loop(tmp_path):
+    store = _SlowRemoteStore(str(tmp_path / "tasks.json"))
+    store.load()
+
+    async def main():
+        api = _api(tmp_path, store)
+        return await _count_ticks(asyncio.gather(*[api.dispatch("GET", "/tasks", b"") for _ in range(2)]))
+
+    results, ticks = asyncio.run(main())
+    assert [status for status, payload in results] == [200, 200]
+    # 2件は1件ずつ処理され（0.4秒）、その間もイベントループは回っている
+    assert ticks >= 20
+    assert store.polls == 2
+
+
+def test_search_during_index_build_does_not_block_the_loop(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    store.load()
+
+    async def main():
+        api = _api(tmp_path, store, _SlowDeck)
+        threading.Thread(target=api.search_index.build, daemon=True).start()
+        return await _count_ticks(api.dispatch("GET", "/words?q=app", b""))
+
+    (status, payload), ticks = asyncio.run(main())
+    assert (status, payload) == (200, {"words": [{"word": "apple", "meaning": "りんご"}]})
+    assert ticks >= 15
+
+
+def test_quiz_answers_must_be_an_object(tmp_path):
+    store = TaskStore(str(tmp_path / "tasks.json"))
+    store.load()
+
+    async def main():
+        api = _api(tmp_path, store)
+        return [await api.dispatch("POST", "/quiz/answers", body) for body in (b"[]", b'"apple"', b"{}")]
+
+    assert [status for status, payload in asyncio.run(main())] == [400, 400, 400]
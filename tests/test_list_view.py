@@ -0,0 +1,46 @@
+import random
+
+from gui.list_view import ListboxView
+
+
+# Listbox の代わり（delete と insert の呼び方は tkinter と同じ）
+class _Listbox:
+    def __init__(self):
+        self.items = []
+        self.calls = 0
+
+    def delete(self, first, last=None):
+        del self.items[first:(first if last is None else last) + 1]
+        self.calls += 1
+
+    def insert(self, index, *items):
+        self.items[index:index] = items
+        self.calls += 1
+
+
+def test_shows_the_rows_after_any_change():
+    listbox = _Listbox()
+    view = ListboxView(listbox)
+    rng = random.Random(1)
+    for _ in range(200):
+        keys = rng.sample(range(30), rng.randint(0, 20))
+        rows = [(key, f"task {key} {rng.randint(0, 2)}") for key in keys]
+        view.update(rows)
+        assert listbox.items == [text for key, text in rows]
+        assert [view.key_at(i) for i in range(len(rows))] == keys
+
+
+def test_only_changed_rows_are_redrawn():
+    listbox = _Listbox()
+    view = ListboxView(listbox)
+    rows = [(key, f"task {key}") for key in range(100)]
+    view.update(rows)
+
+    listbox.calls = 0
+    view.update(rows[:50] + [(1000, "new")] + rows[50:])
+    assert listbox.calls == 1
+
+    listbox.calls = 0
+    view.update(rows[:10] + [(10, "renamed")] + rows[11:])
+    assert listbox.calls == 3  # 追加した行の削除と、書き換えた行の削除・挿入
+    assert listbox.items[10] == "renamed"
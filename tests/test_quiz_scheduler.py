@@ -0,0 +1,35 @@
+import json
+
+from core.background_writer import BackgroundWriter
+from core.quiz_scheduler import QuizScheduler
+from core.vocab_store import open_deck
+
+
+def _scheduler(tmp_path, size=10):
+    deck_path = tmp_path / "vocabulary.json"
+    if not deck_path.exists():
+        deck_path.write_text(json.dumps({f"w{i}": f"m{i}" for i in range(size)}), encoding="utf-8")
+    writer = BackgroundWriter()
+    return QuizScheduler(open_deck(str(deck_path)), str(tmp_path / "schedule.jsonl"), writer).load(), writer
+
+
+def test_unanswered_new_words_are_offered_again(tmp_path):
+    scheduler, writer = _scheduler(tmp_path)
+    cards = scheduler.next_cards(3)
+    # 途中でやめて、一番後ろの単語だけ答えた
+    scheduler.answer_all([("w2", True)])
+    assert {word for word, meaning in cards} == {"w0", "w1", "w2"}
+    assert {word for word, meaning in scheduler.next_cards(3)} == {"w0", "w1", "w3"}
+
+    # 読み込み直しても同じ
+    writer.flush()
+    scheduler, writer = _scheduler(tmp_path)
+    assert {word for word, meaning in scheduler.next_cards(3)} == {"w0", "w1", "w3"}
+    assert scheduler.next_card()[0] == "w0"
+
+
+def test_answered_prefix_advances(tmp_path):
+    scheduler, writer = _scheduler(tmp_path)
+    scheduler.next_cards(3)
+    scheduler.answer_all([("w1", True), ("w0", False), ("w2", True)])
+    assert {word for word, meaning in scheduler.next_cards(2)} == {"w3", "w4"}
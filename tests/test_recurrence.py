@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from core.task_model import Recurrence, Task, parse_deadline
+from core.task_store import SqliteTaskStore, TaskStore
+
+NOW = datetime(2026, 10, 18, 12, 0)
+
+
+def _deadlines(tasks):
+    return [task.deadline for task in tasks]
+
+
+def _store(tmp_path, sqlite=False):
+    if sqlite:
+        store = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    else:
+        store = TaskStore(str(tmp_path / "tasks.json"))
+    store.load()
+    return store
+
+
+def test_long_running_rule_shows_first_overdue_and_this_week(tmp_path):
+    for sqlite in (False, True):
+        store = _store(tmp_path, sqlite)
+        store.add(Task("日課", False, "2022/01/01", repeat=Recurrence("daily")))
+        assert _deadlines(store.upcoming(NOW + timedelta(days=7), now=NOW)) == [
+            "2022/01/01", "2026/10/19", "2026/10/20", "2026/10/21", "2026/10/22",
+            "2026/10/23", "2026/10/24", "2026/10/25",
+        ]
+        store.close()
+
+
+def test_done_moves_the_overdue_occurrence(tmp_path):
+    store = _store(tmp_path)
+    task_id = store.add(Task("日課", False, "2022/01/01 09:00", repeat=Recurrence("daily")))
+    task = store.get(task_id)
+    assert task.complete().deadline == "2022/01/01 09:00"
+    store.update(task)
+    assert _deadlines(store.upcoming(NOW + timedelta(days=1), now=NOW))[0] == "2022/01/02 09:00"
+
+    # 今より後まで完了済みなら期限切れの回は出ない
+    task.repeat.done = parse_deadline("2026/10/19 09:00")[0]
+    store.update(task)
+    assert _deadlines(store.upcoming(NOW + timedelta(days=2), now=NOW)) == ["2026/10/20 09:00"]
+    # 完了済みも含めると期間の中の完了した回も出る
+    assert _deadlines(store.upcoming(NOW + timedelta(days=2), include_completed=True, now=NOW)) == [
+        "2026/10/19 09:00", "2026/10/20 09:00",
+    ]
+
+
+def test_last_occurrence_completes_the_task(tmp_path):
+    task = Task("3回", False, "2026/01/01", repeat=Recurrence("weekly", count=3))
+    assert [task.complete().deadline for _ in range(3)] == ["2026/01/01", "2026/01/08", "2026/01/15"]
+    assert task.completed
+    assert task.next_occurrence() is None
+
+
+def test_monthly_rule_clamps_to_month_end():
+    task = Task("家賃", False, "2027/12/31 09:00", repeat=Recurrence("monthly", until="2028/04/30"))
+    first, last = parse_deadline("2027/01/01")[0], parse_deadline("2029/01/01")[0]
+    assert _deadlines(task.occurrences(first, last)) == [
+        "2027/12/31 09:00", "2028/01/31 09:00", "2028/02/29 09:00", "2028/03/31 09:00", "2028/04/30 09:00",
+    ]
+    # 期間の途中から数えても同じ日になる
+    first = parse_deadline("2028/03/01")[0]
+    assert _deadlines(task.occurrences(first, last)) == ["2028/03/31 09:00", "2028/04/30 09:00"]
+
+
+def test_on_date_and_between_expand_only_the_window(tmp_path):
+    store = _store(tmp_path)
+    store.add(Task("隔週", False, "2022/01/03 08:00", repeat=Recurrence("weekly", 2)))
+    assert _deadlines(store.on_date("2026/10/19")) == ["2026/10/19 08:00"]
+    assert store.on_date("2026/10/26") == []
+    first = datetime(2026, 10, 1).toordinal()
+    assert _deadlines(store.between(first, first + 30)) == ["2026/10/05 08:00", "2026/10/19 08:00"]
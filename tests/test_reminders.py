@@ -0,0 +1,29 @@
+from core.reminders import Reminders
+from core.task_model import Recurrence, Task, format_minutes, parse_deadline
+
+
+def _fire_all(reminders):
+    fired = []
+    while (now := reminders.next_time()) is not None:
+        fired += [(format_minutes(due), lead) for task_id, due, lead in reminders.pop_due(now)]
+    return fired
+
+
+def test_recurring_reminders_report_each_occurrence():
+    task = Task("朝", False, "2026/01/01 07:00", id=1, repeat=Recurrence("daily", count=3))
+    reminders = Reminders((60, 0))
+    reminders.load([task], parse_deadline("2026/01/01 05:00")[0])
+    assert _fire_all(reminders) == [
+        ("2026/01/01 07:00", 60), ("2026/01/01 07:00", 0),
+        ("2026/01/02 07:00", 60), ("2026/01/02 07:00", 0),
+        ("2026/01/03 07:00", 60), ("2026/01/03 07:00", 0),
+    ]
+    assert task.deadline_of(parse_deadline("2026/01/02 07:00")[0]) == "2026/01/02 07:00"
+
+
+def test_one_off_reminder_keeps_closest_lead():
+    task = Task("提出", False, "2026/01/01 12:00", id=1)
+    reminders = Reminders()
+    reminders.load([task], parse_deadline("2025/12/31 00:00")[0])
+    # スリープから戻ったときなど、溜まっていた予定はまとめて締め切りに近いほうだけ
+    assert reminders.pop_due(parse_deadline("2026/01/01 12:30")[0]) == [(1, task.due, 0)]
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core import task_client
+from core.task_client import RemoteTaskStore
+from core.task_model import Task
+from core.task_server import TaskServer
+from core.task_store import TaskStore
+
+
+# 最初の更新だけ、画面が待つのをあきらめたあとに応答するサーバー
+class _LateServer(TaskServer):
+    late = True
+
+    def apply(self, request):
+        if request.get("op") == "update" and self.late:
+            self.late = False
+            time.sleep(0.45)
+        return super().apply(request)
+
+
+# server_class のサーバーを別スレッドで動かし、(パス, ポート) を返す
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    started = threading.Event()
+    running = {}
+
+    def start(server_class=TaskServer):
+        store = TaskStore(path)
+        store.load()
+        server = server_class(store, source=path)
+
+        async def serve():
+            running["loop"] = asyncio.get_running_loop()
+            running["stop"] = asyncio.Event()
+            async with await asyncio.start_server(server.handle, "127.0.0.1", 0) as listener:
+                running["port"] = listener.sockets[0].getsockname()[1]
+                started.set()
+                await running["stop"].wait()
+
+        running["thread"] = threading.Thread(target=asyncio.run, args=(serve(),))
+        running["thread"].start()
+        started.wait()
+        return path, running["port"]
+
+    yield start
+    if running:
+        running["loop"].call_soon_threadsafe(running["stop"].set)
+        running["thread"].join()
+
+
+def _client(path, port):
+    store = RemoteTaskStore(path, port=port, autostart=False)
+    store.load()
+    return store
+
+
+def test_rejected_update_leaves_the_task_unchanged(server):
+    path, port = server()
+    first, second = _client(path, port), _client(path, port)
+    task_id = first.add(Task("a", False, "2026/01/01 10:00"))
+    # 他の画面に追加が届いてから、そちらで削除する
+    while second.get(task_id) is None:
+        time.sleep(0.01)
+        second.poll_changes()
+    second.remove(task_id)
+
+    task = first.get(task_id)
+    changed = task.copy()
+    changed.completed = True
+    with pytest.raises(KeyError):
+        first.update(changed)
+    assert task.completed is False
+    assert first.by_deadline() == [task]
+    first.close()
+    second.close()
+
+
+def test_late_response_is_discarded(server, monkeypatch):
+    monkeypatch.setattr(task_client, "REQUEST_TIMEOUT", 0.3)
+    path, port = server(_LateServer)
+    store = _client(path, port)
+    task_id = store.add(Task("a", False, "2026/01/01 10:00"))
+
+    task = store.get(task_id)
+    changed = task.copy()
+    changed.name = "b"
+    with pytest.raises(TimeoutError):
+        store.update(changed)
+    assert task.name == "a"
+    # 時間切れになった更新の応答ではなく、この要求の応答を受け取る
+    other_id = store.add(Task("c", False, "2026/01/02 10:00"))
+    assert other_id != task_id
+    assert [task.name for task in store.by_deadline()] == ["a", "c"]
+    # 受け付けられた変更は手元のタスクに写る
+    store.update(changed)
+    assert task.name == "b"
+    assert store.find("b") == [task]
+    store.close()
@@ -0,0 +1,36 @@
+from core.task_server import TaskServer
+from core.task_store import TaskStore
+
+
+def _server(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store = TaskStore(path)
+    store.load()
+    return TaskServer(store, source=path), path
+
+
+def test_load_accepts_the_same_file(tmp_path):
+    server, path = _server(tmp_path)
+    response, event = server.apply({"op": "load", "path": path})
+    assert response["result"] == {"tasks": [], "seq": 0}
+
+
+def test_load_accepts_any_layout_of_the_same_file(tmp_path):
+    # test.py（dict 形式）と他の画面（list 形式）は同じサーバーを使える
+    server, path = _server(tmp_path)
+    for request in (
+        {"op": "load", "path": path, "empty": "dict", "sqlite": False},
+        {"op": "load", "path": path, "empty": "list", "sqlite": True},
+    ):
+        response, event = server.apply(request)
+        assert "error" not in response
+
+
+def test_load_rejects_another_file(tmp_path):
+    server, path = _server(tmp_path)
+    for request in (
+        {"op": "load", "path": str(tmp_path / "other.json")},
+        {"op": "load"},
+    ):
+        response, event = server.apply(request)
+        assert response["error"] == "ValueError"
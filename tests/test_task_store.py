@@ -0,0 +1,79 @@
+import pytest
+
+from core.background_writer import BackgroundWriter
+from core.task_model import Task
+from core.task_store import SqliteTaskStore, TaskStore
+
+
+# 保存先を開く（close せずに writer.flush() だけすると、終了処理をせずに落ちたときと同じになる）
+def _open(path):
+    writer = BackgroundWriter()
+    store = TaskStore(path, writer=writer)
+    store.load()
+    return store, writer
+
+
+def test_torn_journal_line_is_truncated(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store, writer = _open(path)
+    store.add(Task("a", False, "2026/01/01 10:00"))
+    writer.flush()
+    # 書き込み途中で落ちた記録
+    with open(path + ".journal", "a", encoding="utf-8") as file:
+        file.write('{"op": "put", "value": {"id": 2, "na')
+
+    store, writer = _open(path)
+    store.add(Task("b", False, "2026/01/02 10:00"))
+    store.add(Task("c", False, "2026/01/03 10:00"))
+    writer.flush()
+
+    store = TaskStore(path)
+    assert [task.name for task in store.load().values()] == ["a", "b", "c"]
+
+
+def test_corrupt_middle_line_is_skipped_and_kept(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store, writer = _open(path)
+    for name in "abcde":
+        store.add(Task(name, False, "2026/01/01 10:00"))
+    writer.flush()
+    with open(path + ".journal", "rb") as file:
+        lines = file.readlines()
+    lines[1] = b"not json\n"
+    with open(path + ".journal", "wb") as file:
+        file.writelines(lines)
+
+    store, writer = _open(path)
+    assert [task.name for task in store.tasks.values()] == ["a", "c", "d", "e"]
+    with open(path + ".journal", "rb") as file:
+        assert file.readlines() == lines
+
+
+def test_sqlite_import_failure_leaves_no_database(tmp_path):
+    json_path = tmp_path / "tasks.json"
+    db_path = tmp_path / "tasks.db"
+    json_path.write_text('[{"name": "a", "completed": false, "deadline": "bad"}]', encoding="utf-8")
+    with pytest.raises(ValueError):
+        SqliteTaskStore(str(db_path), import_path=str(json_path)).load()
+    assert not db_path.exists()
+
+    # 直したJSONは次の起動で取り込まれる
+    json_path.write_text('[{"name": "a", "completed": false, "deadline": "2026/01/01"}]', encoding="utf-8")
+    store = SqliteTaskStore(str(db_path), import_path=str(json_path))
+    assert [task.name for task in store.load().values()] == ["a"]
+    store.close()
+
+
+def test_journal_replays_puts_and_removes(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    store, writer = _open(path)
+    a = store.add(Task("a", False, "2026/01/01 10:00"))
+    b = store.add(Task("b", False, "2026/01/02 10:00"))
+    task = store.get(a)
+    task.completed = True
+    store.update(task)
+    store.remove(b)
+    writer.flush()
+
+    store = TaskStore(path)
+    assert [(task.id, task.name, task.completed) for task in store.load().values()] == [(a, "a", True)]
@@ -0,0 +1,40 @@
+from core.vocab_import import import_file
+from core.vocab_store import LazyDeck
+
+
+def _deck(tmp_path, words):
+    deck = LazyDeck(str(tmp_path / "vocabulary.json")).open()
+    for word, meaning in words.items():
+        deck[word] = meaning
+    deck.save()
+    return deck
+
+
+def test_new_words_duplicates_and_conflicts(tmp_path):
+    deck = _deck(tmp_path, {"apple": "りんご", "book": "本"})
+    path = tmp_path / "words.csv"
+    path.write_text(
+        "word,meaning\n"
+        "apple,りんご\n"      # 単語帳と同じ
+        "book,書籍\n"         # 単語帳と食い違う
+        "cat,猫\n"
+        "cat,猫\n"            # ファイル内の重複
+        "dog,犬\n"
+        "dog,いぬ\n"          # ファイル内の食い違い（最初の行を使う）
+        ",空\n",              # 単語が空
+        encoding="utf-8",
+    )
+    report = import_file(deck, str(path))
+    assert (report.added, report.duplicates, report.conflict_count, report.skipped) == (2, 2, 2, 1)
+    assert ("book", "本", "書籍") in report.conflicts
+    assert list(deck.items()) == [("apple", "りんご"), ("book", "本"), ("cat", "猫"), ("dog", "犬")]
+
+
+def test_overwrite_replaces_conflicting_meanings(tmp_path):
+    deck = _deck(tmp_path, {"apple": "りんご", "book": "本"})
+    path = tmp_path / "words.tsv"
+    path.write_text("book\t書籍\n", encoding="utf-8")
+    report = import_file(deck, str(path), overwrite=True)
+    assert (report.added, report.conflict_count) == (0, 1)
+    deck.close()
+    assert dict(LazyDeck(deck.path).open().items()) == {"apple": "りんご", "book": "書籍"}
@@ -0,0 +1,49 @@
+from core.vocab_search import SearchIndex
+from core.vocab_store import LazyDeck
+
+
+def _deck(tmp_path, words):
+    deck = LazyDeck(str(tmp_path / "vocabulary.json")).open()
+    for word, meaning in words.items():
+        deck[word] = meaning
+    deck.save()
+    return deck
+
+
+def _words(found):
+    return [word for word, meaning in found]
+
+
+def test_prefix_matches_come_before_substring_matches(tmp_path):
+    deck = _deck(tmp_path, {"pineapple": "パイナップル", "apple": "りんご", "application": "応用", "map": "地図"})
+    index = SearchIndex(deck)
+    assert _words(index.search("app")) == ["apple", "application", "pineapple"]
+    assert _words(index.search("app", limit=2)) == ["apple", "application"]
+    # 意味も探す、1文字でも探せる
+    assert _words(index.search("地図")) == ["map"]
+    assert _words(index.search("図")) == ["map"]
+    assert index.search("") == []
+    assert index.search("zzz") == []
+
+
+def test_width_and_case_are_ignored(tmp_path):
+    deck = _deck(tmp_path, {"Apple": "りんご", "ｃａｔ": "猫"})
+    index = SearchIndex(deck)
+    index.build()
+    assert _words(index.search("APP")) == ["Apple"]
+    assert _words(index.search("cat")) == ["ｃａｔ"]
+    assert _words(index.search("ＣＡ")) == ["ｃａｔ"]
+
+
+def test_added_and_changed_words_are_found(tmp_path):
+    deck = _deck(tmp_path, {"apple": "りんご", "book": "本"})
+    index = SearchIndex(deck)
+    index.build()
+    deck["apricot"] = "あんず"
+    index.put(deck.index_of("apricot"), "apricot", "あんず")
+    deck["book"] = "書籍"
+    index.put(deck.index_of("book"), "book", "書籍")
+    assert _words(index.search("ap")) == ["apple", "apricot"]
+    assert index.search("書籍") == [("book", "書籍")]
+    # 書き換える前の意味では見つからない
+    assert index.search("本") == []
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from core.vocab_store import BinaryDeck, LazyDeck
+
+
+@pytest.fixture(params=[LazyDeck, BinaryDeck])
+def deck(request, tmp_path):
+    path = tmp_path / ("vocabulary.json" if request.param is LazyDeck else "vocabulary.vdk")
+    deck = request.param(str(path)).open()
+    yield deck
+    deck.close()
+
+
+def test_saved_words_are_read_back(deck, tmp_path):
+    deck["apple"] = "りんご"
+    deck["book"] = "本"
+    deck.save()
+    deck["apple"] = "林檎"
+    deck["cat"] = "猫"
+    assert deck.entries(0, 10) == [("apple", "林檎"), ("book", "本"), ("cat", "猫")]
+    deck.save()
+    deck.close()
+
+    reopened = type(deck)(deck.path).open()
+    assert list(reopened.items()) == [("apple", "林檎"), ("book", "本"), ("cat", "猫")]
+    assert reopened["book"] == "本"
+    assert reopened.entry(-1) == ("cat", "猫")
+    assert reopened.index_of("cat") == 2
+    assert reopened.index_of("dog") is None
+    with pytest.raises(KeyError):
+        reopened["dog"]
+    reopened.close()
+
+
+def test_reading_while_saving_sees_each_word_once(deck):
+    for i in range(200):
+        deck[f"word{i}"] = str(i)
+    deck.save()
+    stop = threading.Event()
+
+    # 保存しながら単語を足していく
+    def write():
+        for i in range(200, 400):
+            deck[f"word{i}"] = str(i)
+            if i % 10 == 0:
+                deck.save()
+        stop.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not stop.is_set():
+        count = len(deck)
+        words = [word for word, meaning in deck.entries(0, count)]
+        assert words == [f"word{i}" for i in range(count)]
+        assert deck.entry(count - 1) == (f"word{count - 1}", str(count - 1))
+    writer.join()
+    deck.save()
+    assert len(deck) == 400
+
+
+def test_word_lookups_stay_right_after_saving(deck):
+    deck["apple"] = "りんご"
+    assert deck.index_of("apple") == 0
+    deck.save()
+    deck["book"] = "本"
+    deck.save()
+    # 保存済みの単語を書き換えても、新しい単語として増えない
+    deck["apple"] = "林檎"
+    deck["cat"] = "猫"
+    assert len(deck) == 3
+    assert [deck.index_of(word) for word in ("apple", "book", "cat")] == [0, 1, 2]
+    assert deck.word_index() == {"apple": 0, "book": 1, "cat": 2}
+    deck.save()
+    assert deck["apple"] == "林檎"
+    assert deck.word_index() == {"apple": 0, "book": 1, "cat": 2}
@@ -1,69 +1,140 @@
-import json
-import random
+from core.quiz_scheduler import QuizScheduler
+from core.vocab_import import import_file
+from core.vocab_search import SearchIndex
+from core.vocab_store import open_deck
 
 # 保存するファイル名
 DATA_FILE = "vocabulary.json"
 
-# 単語データの読み込み
+# True にするとバイナリ形式（vocabulary.vdk）で読み書きする（初回は DATA_FILE から取り込む）
+USE_BINARY = False
+BINARY_FILE = "vocabulary.vdk"
+
+# クイズの出題予定（単語ごとの箱と次に出す時刻）を記録するファイル
+SCHEDULE_FILE = "vocabulary.schedule.jsonl"
+
+# まとめて出題するときの問題数
+SESSION_SIZE = 10
+
+# 単語リストを1ページに表示する件数
+PAGE_SIZE = 20
+
+# 単語データの読み込み（位置の一覧だけ読み、各単語は必要になったときに読む）
 def load_data():
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+    return open_deck(BINARY_FILE if USE_BINARY else DATA_FILE, import_path=DATA_FILE)
 
-# 単語データの保存
+# 単語データの保存（変更があれば一時ファイルに書いてから置き換える）
 def save_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    data.save()
 
 # 単語の追加
-def add_word(data):
+def add_word(data, search_index):
     word = input("追加する単語を入力してください: ")
     meaning = input(f"{word}の意味を入力してください: ")
     data[word] = meaning
+    search_index.put(data.index_of(word), word, meaning)
     print(f"「{word}」が追加されました。")
 
-# 単語リストの表示
-def show_words(data):
-    if data:
-        print("\n--- 単語リスト ---")
-        for word, meaning in data.items():
-            print(f"{word}: {meaning}")
-    else:
-        print("単語が登録されていません。")
+# CSV/TSV（単語,意味）からまとめて取り込む（ファイルは少しずつ読み、保存は最後に1回）
+def import_words(data):
+    path = input("取り込むファイル（CSV / TSV）のパスを入力してください: ").strip()
+    try:
+        overwrite = input("意味が違う単語はファイルの意味で置き換えますか？ (y/N): ").strip().lower() == "y"
+        report = import_file(data, path, overwrite=overwrite)
+    except (OSError, ValueError) as error:
+        print(f"ファイルを読み込めませんでした: {error}")
+        return
+    print(report)
 
-# クイズ機能
-def quiz(data):
+# 単語リストの表示（page_size 件ずつ読み込んで表示し、Enter で次のページへ）
+def show_words(data, page_size=PAGE_SIZE):
     if not data:
         print("単語が登録されていません。")
         return
-    word = random.choice(list(data.keys()))
+    print("\n--- 単語リスト ---")
+    total = len(data)
+    for start in range(0, total, page_size):
+        for word, meaning in data.entries(start, start + page_size):
+            print(f"{word}: {meaning}")
+        shown = min(start + page_size, total)
+        if shown < total and input(f"-- {shown}/{total} 件（Enter: 次へ, q: 終了）-- ").strip().lower() == "q":
+            break
+
+# 単語の検索（単語の前方一致と、単語・意味の部分一致）
+def search_words(search_index):
+    query = input("検索する文字を入力してください: ")
+    results = search_index.search(query)
+    if not results:
+        print("見つかりませんでした。")
+        return
+    print(f"\n--- 「{query}」の検索結果 ---")
+    for word, meaning in results:
+        print(f"{word}: {meaning}")
+
+# クイズ機能（出題予定の早い単語から出し、結果で次に出す時刻を決める）
+def quiz(scheduler):
+    card = scheduler.next_card()
+    if card is None:
+        print("単語が登録されていません。")
+        return
+    word, meaning = card
     answer = input(f"「{word}」の意味は何ですか？: ")
-    if answer == data[word]:
+    scheduler.answer(word, answer == meaning)
+    if answer == meaning:
         print("正解！")
     else:
-        print(f"不正解... 正しい意味は「{data[word]}」です。")
+        print(f"不正解... 正しい意味は「{meaning}」です。")
+
+# まとめてクイズ（SESSION_SIZE 問を先に選んで続けて出し、結果は最後にまとめて記録する）
+def quiz_session(scheduler):
+    cards = scheduler.next_cards(SESSION_SIZE)
+    if not cards:
+        print("単語が登録されていません。")
+        return
+    results = []
+    for number, (word, meaning) in enumerate(cards, 1):
+        answer = input(f"（{number}/{len(cards)}）「{word}」の意味は何ですか？: ")
+        results.append((word, answer == meaning))
+        if answer == meaning:
+            print("正解！")
+        else:
+            print(f"不正解... 正しい意味は「{meaning}」です。")
+    scheduler.answer_all(results)
+    correct = sum(1 for word, ok in results if ok)
+    print(f"\n{len(results)} 問中 {correct} 問正解です。")
 
 # メイン処理
 def main():
     data = load_data()
+    scheduler = QuizScheduler(data, SCHEDULE_FILE).load()
+    search_index = SearchIndex(data)  # 最初に検索したときに作る
     while True:
         print("\n--- 単語帳アプリ ---")
         print("1: 単語を追加")
         print("2: 単語を表示")
-        print("3: クイズに挑戦")
-        print("4: 終了")
+        print("3: 単語を検索")
+        print("4: クイズに挑戦")
+        print(f"5: まとめてクイズ（{SESSION_SIZE}問）")
+        print("6: ファイルから取り込む")
+        print("7: 終了")
         choice = input("番号を選択してください: ")
 
         if choice == "1":
-            add_word(data)
+            add_word(data, search_index)
         elif choice == "2":
             show_words(data)
         elif choice == "3":
-            quiz(data)
+            search_words(search_index)
         elif choice == "4":
+            quiz(scheduler)
+        elif choice == "5":
+            quiz_session(scheduler)
+        elif choice == "6":
+            import_words(data)
+            search_index = SearchIndex(data)  # 番号が増えたので索引は作り直す
+        elif choice == "7":
             save_data(data)
+            scheduler.close()
             print("アプリを終了します。")
             break
         else: